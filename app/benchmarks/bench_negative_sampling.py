@@ -0,0 +1,156 @@
+"""
+부정 샘플링 벤치마크: 기존 iterrows 루프 vs Preprocessing.sample_negatives (배우별 NumPy choice)
+
+실행: python app/benchmarks/bench_negative_sampling.py [--skip-legacy] [--workers 1 2 4] [--scale 20]
+실제 데이터(add_genre_story.json)로 두 방식의 소요 시간과 결과 분포를 비교한다.
+- 부정:긍정 비율, 배우별 부정 샘플 수, 중복 행 수
+- 출연 영화/출연 장르 제외 조건 위반 수 (0 이어야 함)
+- 장르별 부정 샘플 비율
+--workers: 데이터를 --scale 배로 복제(배우/타이틀 이름에 접미사)하여 순차 저장 대비 워커 수별 샤드 병렬 저장 시간 측정, 출력 파일이 같은지 확인
+"""
+import argparse
+import filecmp
+import tempfile
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../utils')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import numpy as np
+import pandas as pd
+import config
+from preprocessing import Preprocessing, available_cpus
+from storage import read_table, write_table, format_path, storage_format
+
+
+def legacy_negatives(positive_df, all_movies):
+    """기존 preprocessing_data() 의 부정 샘플링 루프 (긍정 행마다 배우 필터링 + 샘플링 + 영화별 가격 조회) 와 1:4 조정"""
+    negative_samples = []
+    for _, row in positive_df.iterrows():
+        cast = row['cast']
+        movies_played_by_cast = positive_df[positive_df['cast'] == cast]['title'].unique()
+        genres_played_by_cast = positive_df[positive_df['cast'] == cast]['genre'].unique()
+        non_cast_movies = all_movies[
+            ~all_movies['title'].isin(movies_played_by_cast) &
+            ~all_movies['genre'].isin(genres_played_by_cast)
+        ]
+        non_cast_movies_sampled = non_cast_movies.sample(
+            n=min(len(non_cast_movies), len(movies_played_by_cast) * 4),
+            random_state=42,
+            replace=False
+        )
+        for _, movie_row in non_cast_movies_sampled.iterrows():
+            matching_movie = all_movies[
+                (all_movies['title'] == movie_row['title']) &
+                (all_movies['genre'] == movie_row['genre']) &
+                (all_movies['percentage'] == movie_row['percentage'])
+            ]
+            negative_samples.append({
+                'cast': cast,
+                'title': movie_row['title'],
+                'genre': movie_row['genre'],
+                'percentage': movie_row['percentage'] if not pd.isna(movie_row['percentage']) else 0,
+                'ticket_price': matching_movie['ticket_price'].iloc[0] if not matching_movie.empty else 0.01,
+                'target': 0
+            })
+    negative_df = pd.DataFrame(negative_samples)
+    if len(negative_df) > len(positive_df) * 4:
+        negative_df = negative_df.sample(n=len(positive_df) * 4, random_state=42)
+    return negative_df
+
+
+def describe(name, negative_df, positive_df, seconds):
+    """결과 분포 요약 한 줄과 배우별/장르별 분포"""
+    played = set(zip(positive_df['cast'], positive_df['title']))
+    played_genres = set(zip(positive_df['cast'], positive_df['genre']))
+    pairs = list(zip(negative_df['cast'], negative_df['title'], negative_df['genre']))
+    title_violations = sum((cast, title) in played for cast, title, _ in pairs)
+    genre_violations = sum((cast, genre) in played_genres for cast, _, genre in pairs)
+    per_cast = negative_df.groupby('cast').size().reindex(positive_df['cast'].unique(), fill_value=0)
+    ratio = per_cast / positive_df.groupby('cast').size().reindex(per_cast.index)
+    print(f"{name:<10} {seconds:>9.2f} {len(negative_df):>8} {len(negative_df) / len(positive_df):>6.2f} "
+          f"{int(negative_df.duplicated(subset=['cast', 'title', 'genre']).sum()):>6} "
+          f"{title_violations:>7} {genre_violations:>7} {ratio.mean():>9.2f} {ratio.std():>8.2f} {(per_cast > 0).mean():>9.3f}")
+    return per_cast, negative_df['genre'].value_counts(normalize=True)
+
+
+def scaled(positive_df, all_movies, scale):
+    """배우/타이틀 이름에 접미사를 붙여 scale 배로 복제 (장르는 그대로, 복제본끼리는 서로 다른 배우/영화)"""
+    positive_df = pd.concat([positive_df.assign(cast=positive_df['cast'] + f"#{i}", title=positive_df['title'] + f"#{i}")
+                             for i in range(scale)], ignore_index=True)
+    all_movies = pd.concat([all_movies.assign(title=all_movies['title'] + f"#{i}") for i in range(scale)],
+                           ignore_index=True)
+    return positive_df, all_movies
+
+
+def same_table(expected, path):
+    """두 중간 데이터 출력이 같은지 (설정된 형식은 읽은 값 기준, JSON lines 는 바이트 단위)"""
+    same = read_table(expected).equals(read_table(path))
+    if os.path.exists(format_path(expected, 'json')):
+        same &= filecmp.cmp(format_path(expected, 'json'), format_path(path, 'json'), shallow=False)
+    return same
+
+
+def bench_workers(preprocessing, positive_df, all_movies, workers_list, scale):
+    """순차 경로(sample_negatives + write_table) 대비 워커 수별 write_sharded 소요 시간과 출력 동일 여부
+
+    병렬 샘플링을 기본값으로 바꾸려면 이 측정에서 속도 향상이 확인되어야 함 (CPU 가 1개면 측정 의미 없음)
+    """
+    positive_df, all_movies = scaled(positive_df, all_movies, scale)
+    print(f"\n복제 x{scale}: 긍정 행 {len(positive_df)}개, 배우 {positive_df['cast'].nunique()}명, 후보 영화 {len(all_movies)}개")
+    print(f"사용 가능한 CPU {available_cpus()}개, 저장 형식 {storage_format()} (JSON export {config.storage_export_json})")
+    if available_cpus() < 2:
+        print("CPU 가 1개라 병렬 속도 향상은 측정할 수 없음 (샤드 오버헤드만 측정됨)")
+    print(f"{'workers':>8} {'seconds':>9} {'speedup':>8} {'same_output':>12}")
+    with tempfile.TemporaryDirectory() as directory:
+        # 기준: preprocessing_data() 의 순차 경로와 같은 저장 (설정된 형식 + JSON lines)
+        expected = os.path.join(directory, "sequential.json")
+        start = time.perf_counter()
+        write_table(pd.concat([positive_df, preprocessing.sample_negatives(positive_df, all_movies)], ignore_index=True),
+                    expected)
+        sequential_seconds = time.perf_counter() - start
+        print(f"{'seq':>8} {sequential_seconds:>9.2f} {1:>8.2f} {'-':>12}")
+        for workers in workers_list:
+            path = os.path.join(directory, f"workers{workers}.json")
+            start = time.perf_counter()
+            preprocessing.write_sharded(positive_df, all_movies, path, workers=workers)
+            seconds = time.perf_counter() - start
+            print(f"{workers:>8} {seconds:>9.2f} {sequential_seconds / seconds:>8.2f} {str(same_table(expected, path)):>12}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="부정 샘플링 벤치마크")
+    parser.add_argument('--skip-legacy', action='store_true', help="기존 루프(수 분 소요) 생략")
+    parser.add_argument('--workers', type=int, nargs='*', default=[], help="샤드 병렬 저장에 사용할 워커 수 목록")
+    parser.add_argument('--scale', type=int, default=20, help="--workers 측정용 데이터 복제 배수")
+    args = parser.parse_args()
+
+    preprocessing = Preprocessing()
+    preprocessing.load_data()
+    positive_df, all_movies = preprocessing.positive_data()
+    print(f"긍정 행 {len(positive_df)}개, 배우 {positive_df['cast'].nunique()}명, 후보 영화 {len(all_movies)}개")
+    print(f"{'method':<10} {'seconds':>9} {'rows':>8} {'neg/pos':>6} {'dups':>6} "
+          f"{'title_x':>7} {'genre_x':>7} {'cast_mean':>9} {'cast_std':>8} {'cast_cov':>9}")
+
+    start = time.perf_counter()
+    vectorized = preprocessing.sample_negatives(positive_df, all_movies)
+    vectorized_seconds = time.perf_counter() - start
+    per_cast, genres = describe('vectorized', vectorized, positive_df, vectorized_seconds)
+
+    # 같은 시드면 같은 결과
+    again = preprocessing.sample_negatives(positive_df, all_movies)
+    assert again.equals(vectorized), "같은 시드에서 결과가 달라짐"
+
+    if not args.skip_legacy:
+        start = time.perf_counter()
+        legacy = legacy_negatives(positive_df, all_movies)
+        legacy_seconds = time.perf_counter() - start
+        legacy_per_cast, legacy_genres = describe('legacy', legacy, positive_df, legacy_seconds)
+        print(f"\n속도 향상: {legacy_seconds / vectorized_seconds:.1f}x")
+        print(f"배우별 부정 샘플 수 상관계수: {np.corrcoef(per_cast, legacy_per_cast)[0, 1]:.3f}")
+        genre_share = pd.concat([legacy_genres.rename('legacy'), genres.rename('vectorized')], axis=1).fillna(0)
+        print(f"장르 비율 총변동거리: {0.5 * (genre_share['legacy'] - genre_share['vectorized']).abs().sum():.3f}")
+        print(genre_share.head(10).round(4).to_string())
+
+    if args.workers:
+        bench_workers(preprocessing, positive_df, all_movies, args.workers, args.scale)
@@ -0,0 +1,90 @@
+"""
+Recommender 상위 후보 선택 벤치마크: 기존 pandas 경로 vs NumPy(argpartition) 경로
+
+실행: python app/benchmarks/bench_ranking.py [반복 횟수]
+df_with_negatives.json 의 실제 (cast, genre) 조합을 사용하며, 두 경로의 결과가 같은지 함께 확인한다.
+"""
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../utils')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import numpy as np
+import pandas as pd
+from recommend import Recommender
+
+
+def pandas_rank(X, cast_encoded, genre_encoded, title_decoder):
+    """기존 recommend() 의 sort_values/concat/map/str.replace 경로"""
+    genre_filtered_data = X[X['genre'] == genre_encoded]
+    cast_filtered_data = X[X['cast'] == cast_encoded]
+    genre_top_titles = genre_filtered_data.sort_values(by='predicted_score', ascending=False).head(15)
+    cast_top_titles = cast_filtered_data.sort_values(by='predicted_score', ascending=False).head(15)
+    combined_titles = pd.concat([genre_top_titles, cast_top_titles])
+    top_titles = combined_titles.sort_values(by='predicted_score', ascending=False)
+    top_titles['decoded_title'] = top_titles['title'].map(title_decoder)
+    top_titles['clean_title'] = top_titles['decoded_title'].str.replace(r'\[.*?\]', '', regex=True).str.strip()
+    return top_titles.drop_duplicates(subset=['clean_title'])
+
+
+def tie_boundaries(X, cast_encoded, genre_encoded):
+    """장르/배우 상위 15개가 각각 잘리는 경계 점수 (이 점수와 동점인 후보는 정렬 방식에 따라 선택이 달라짐)"""
+    boundaries = []
+    for column, value in [('genre', genre_encoded), ('cast', cast_encoded)]:
+        filtered_scores = X.loc[X[column] == value, 'predicted_score']
+        if len(filtered_scores) > 15:
+            boundaries.append(filtered_scores.nlargest(15).iloc[-1])
+    return np.array(boundaries, dtype=np.float32)
+
+
+def numpy_rank(recommender, cast_encoded, genre_encoded):
+    return recommender.rank(cast_encoded, genre_encoded)
+
+
+def main(repeat=3):
+    recommender = Recommender()
+    recommender.load_data()
+    try:
+        recommender.load_score_table()
+    except FileNotFoundError:
+        recommender.load_model()
+
+    X = recommender.predict_candidates()
+    title_decoder = {v: k for k, v in recommender.label_encoders['title'].items()}
+    pairs = recommender.data[['cast', 'genre']].drop_duplicates().itertuples(index=False)
+    pairs = [(recommender.label_encoders['cast'][c], recommender.label_encoders['genre'][g]) for c, g in pairs]
+    print(f"후보 {len(X)}개, (cast, genre) 조합 {len(pairs)}개, 반복 {repeat}회")
+
+    # 동점(float32 포화 점수) 사이의 순서는 정렬 알고리즘마다 다르므로 점수 순서로 비교하고,
+    # 상위 15개 경계 점수와 동점인 후보는 어느 쪽이 선택될지 정해져 있지 않으므로 비교에서 빼고,
+    # 동점 후보가 선택되면 같은 제목의 낮은 점수 행이 중복 제거되므로 그 제목도 함께 뺌
+    mismatches = 0
+    candidates = recommender.candidate_arrays()
+    for cast_encoded, genre_encoded in pairs:
+        boundaries = tie_boundaries(X, cast_encoded, genre_encoded)
+        expected_rows = pandas_rank(X, cast_encoded, genre_encoded, title_decoder)
+        expected, expected_titles = expected_rows['predicted_score'].to_numpy(), expected_rows['clean_title'].to_numpy()
+        top = numpy_rank(recommender, cast_encoded, genre_encoded)
+        actual, actual_titles = candidates['score'][top], recommender.clean_titles[candidates['title'][top]]
+        tied_titles = np.concatenate([expected_titles[np.isin(expected, boundaries)],
+                                      actual_titles[np.isin(actual, boundaries)]])
+        if not np.array_equal(actual[~np.isin(actual_titles, tied_titles)],
+                              expected[~np.isin(expected_titles, tied_titles)]):
+            mismatches += 1
+    print(f"결과 불일치: {mismatches}/{len(pairs)}")
+
+    for name, fn in [('pandas', lambda c, g: pandas_rank(X, c, g, title_decoder)),
+                     ('numpy', lambda c, g: numpy_rank(recommender, c, g))]:
+        timings = []
+        for _ in range(repeat):
+            for cast_encoded, genre_encoded in pairs:
+                start = time.perf_counter()
+                fn(cast_encoded, genre_encoded)
+                timings.append(time.perf_counter() - start)
+        timings = np.array(timings) * 1000
+        print(f"{name:>6}: p50 {np.percentile(timings, 50):.3f} ms, "
+              f"p95 {np.percentile(timings, 95):.3f} ms, 평균 {timings.mean():.3f} ms")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 3)
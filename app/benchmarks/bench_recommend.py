@@ -0,0 +1,93 @@
+"""
+Recommender 지연 시간/처리량 벤치마크
+
+실행: python app/benchmarks/bench_recommend.py [--pairs 200] [--repeat 3] [--mode table|numpy|keras] [--json 결과.json]
+df_with_negatives.json 에서 고정된 시드로 뽑은 (cast, genre) 조합을 recommend() 에 재생하고,
+전체 처리량(req/s), 지연 시간 백분위수, 단계별(encode, candidates, rank, reference_merge) p50/p95 를 출력한다.
+"""
+import argparse
+import contextlib
+import io
+import json
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../utils')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import numpy as np
+import pandas as pd
+import config
+from recommend import Recommender
+from latency import StageTimer
+
+
+def load_pairs(n_pairs, seed):
+    """학습 데이터의 실제 (cast, genre) 조합 중 고정 시드로 n_pairs 개 선택"""
+    data = pd.read_json(config.df_with_negatives_path, lines=True)
+    pairs = data.loc[data['target'] == 1, ['cast', 'genre']].drop_duplicates().sort_values(['cast', 'genre'])
+    pairs = pairs.sample(n=min(n_pairs, len(pairs)), random_state=seed)
+    return list(pairs.itertuples(index=False, name=None))
+
+
+def build_recommender(mode):
+    recommender = Recommender()
+    recommender.load_label_encoders()
+    recommender.load_reference_data()
+    if mode == 'table':
+        recommender.load_score_table()
+    else:
+        recommender.load_data()
+        recommender.load_numpy_model() if mode == 'numpy' else recommender.load_model()
+    return recommender
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--pairs', type=int, default=200)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--seed', type=int, default=42)
+    parser.add_argument('--mode', choices=['table', 'numpy', 'keras'], default='table')
+    parser.add_argument('--json', help='결과를 저장할 JSON 파일 경로')
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    recommender = build_recommender(args.mode)
+    load_seconds = time.perf_counter() - start
+    pairs = load_pairs(args.pairs, args.seed)
+
+    # 첫 호출(후보 점수 계산/캐싱)은 별도로 측정하고 통계에서 제외
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        recommender.recommend(*pairs[0])
+    first_call_seconds = time.perf_counter() - start
+
+    timer = recommender.enable_timing(StageTimer())
+    latencies = []
+    start = time.perf_counter()
+    with contextlib.redirect_stdout(io.StringIO()):
+        for _ in range(args.repeat):
+            for cast, genre in pairs:
+                request_start = time.perf_counter()
+                recommender.recommend(cast, genre)
+                latencies.append(time.perf_counter() - request_start)
+    elapsed = time.perf_counter() - start
+    latencies = np.array(latencies) * 1000
+
+    result = {
+        'mode': args.mode,
+        'pairs': len(pairs),
+        'requests': len(latencies),
+        'load_s': round(load_seconds, 4),
+        'first_call_ms': round(first_call_seconds * 1000, 4),
+        'throughput_rps': round(len(latencies) / elapsed, 2),
+        'latency_ms': {f'p{p}': round(float(np.percentile(latencies, p)), 4) for p in (50, 95, 99)},
+        'stages': timer.summary(),
+    }
+    print(json.dumps(result, ensure_ascii=False, indent=2))
+    if args.json:
+        with open(args.json, 'w', encoding='utf-8') as file:
+            json.dump(result, file, ensure_ascii=False, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+후보 생성(두 타워 내적 인덱스) 벤치마크: 전체 타이틀 점수 계산 vs flat / IVF 후보 + DeepFM 점수 계산
+
+실행: python app/benchmarks/bench_retrieval.py [--pairs 100] [--candidates 300] [--nprobe 8]
+1. 실제 카탈로그: 조합별 rank 단계 지연 시간과 상위 15개가 전체 점수 계산 결과와 얼마나 겹치는지(recall@15)
+2. 카탈로그 크기 확장(타이틀 벡터를 잡음과 함께 복제): 인덱스 검색 시간이 카탈로그 크기에 따라 어떻게 늘어나는지
+"""
+import argparse
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../utils')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import numpy as np
+from recommend import Recommender
+from retrieval import TitleIndex
+from bench_recommend import load_pairs
+
+
+def rank_stage(recommender, pairs):
+    """조합별 rank_retrieval 소요 시간과 상위 15개 타이틀 id"""
+    timings, tops = [], []
+    for cast, genre in pairs:
+        genre_encoded = recommender.label_encoders['genre'][genre]
+        start = time.perf_counter()
+        top, candidates = recommender.rank_retrieval(cast, genre_encoded)
+        timings.append(time.perf_counter() - start)
+        tops.append(set(candidates['title'][top].tolist()))
+    return np.array(timings) * 1000, tops
+
+
+def bench_catalog(pairs, n_candidates, nprobe):
+    recommender = Recommender()
+    recommender.load_label_encoders()
+    recommender.load_data()
+    recommender.load_numpy_model()
+    num_titles = len(recommender.titles)
+    nlist = int(np.sqrt(num_titles))
+
+    # 기준: 전체 타이틀을 후보로
+    start = time.perf_counter()
+    recommender.enable_retrieval(n_candidates=None)
+    print(f"두 타워 벡터/인덱스 생성: {time.perf_counter() - start:.2f}s")
+    exhaustive_ms, exhaustive_tops = rank_stage(recommender, pairs)
+    print(f"카탈로그 타이틀 {num_titles}개, 조합 {len(pairs)}개")
+    print(f"{'mode':<22} {'p50_ms':>8} {'p95_ms':>8} {'recall@15':>10}")
+    print(f"{'exhaustive':<22} {np.percentile(exhaustive_ms, 50):>8.3f} {np.percentile(exhaustive_ms, 95):>8.3f} {1.0:>10.3f}")
+
+    for name, nlist_option in [(f'flat n={n_candidates}', None), (f'ivf{nlist} p{nprobe} n={n_candidates}', nlist)]:
+        recommender.enable_retrieval(n_candidates=n_candidates, nlist=nlist_option, nprobe=nprobe)
+        timings, tops = rank_stage(recommender, pairs)
+        recall = np.mean([len(top & expected) / max(len(expected), 1)
+                          for top, expected in zip(tops, exhaustive_tops)])
+        print(f"{name:<22} {np.percentile(timings, 50):>8.3f} {np.percentile(timings, 95):>8.3f} {recall:>10.3f}")
+    return recommender
+
+
+def bench_scaling(recommender, n_candidates, nprobe, repeat=50):
+    """타이틀 벡터를 잡음과 함께 복제하여 카탈로그를 키웠을 때 검색 시간"""
+    rng = np.random.default_rng(42)
+    vectors = recommender.retrieval.index.vectors
+    queries = recommender.retrieval.cast_vectors[rng.choice(len(recommender.retrieval.cast_vectors), repeat)]
+    print(f"\n{'titles':>8} {'flat_ms':>9} {'ivf_ms':>8} {'ivf_recall':>11}")
+    for copies in [1, 10, 70]:
+        catalog = np.concatenate([vectors + rng.normal(0, 0.01, vectors.shape).astype(np.float32)
+                                  for _ in range(copies)])
+        flat = TitleIndex(catalog)
+        ivf = TitleIndex(catalog, nlist=int(np.sqrt(len(catalog))), nprobe=nprobe)
+        results = {}
+        for name, index in [('flat', flat), ('ivf', ivf)]:
+            start = time.perf_counter()
+            results[name] = [set(index.search(query, n_candidates).tolist()) for query in queries]
+            results[f'{name}_ms'] = (time.perf_counter() - start) / repeat * 1000
+        recall = np.mean([len(a & b) / len(b) for a, b in zip(results['ivf'], results['flat'])])
+        print(f"{len(catalog):>8} {results['flat_ms']:>9.3f} {results['ivf_ms']:>8.3f} {recall:>11.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="후보 생성 인덱스 벤치마크")
+    parser.add_argument('--pairs', type=int, default=100)
+    parser.add_argument('--candidates', type=int, default=300)
+    parser.add_argument('--nprobe', type=int, default=8)
+    parser.add_argument('--seed', type=int, default=42)
+    args = parser.parse_args()
+
+    pairs = load_pairs(args.pairs, args.seed)
+    recommender = bench_catalog(pairs, args.candidates, args.nprobe)
+    bench_scaling(recommender, args.candidates, args.nprobe)
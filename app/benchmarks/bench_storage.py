@@ -0,0 +1,92 @@
+"""
+파이프라인 중간 데이터 저장 형식 벤치마크: JSON lines vs Parquet vs Feather
+
+실행: python app/benchmarks/bench_storage.py [--repeat 5] [--scale 1]
+중간 데이터(processed_data, add_genre_story, df_with_negatives)별로 형식마다 쓰기/읽기 시간과 파일 크기를 측정하고,
+읽은 결과가 JSON 과 같은지(실수는 1e-9 이내, 혼합 타입 컬럼은 문자열로 정리한 값) 확인한다. 앱 시작 시 읽는 경로(Recommender.load_reference_data, 배우 목록)도 측정.
+--scale: 행을 복제하여 큰 이력 데이터에서의 차이 확인
+"""
+import argparse
+import tempfile
+import time
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../utils')))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import numpy as np
+import pandas as pd
+import storage
+from storage import read_table, write_table, format_path, pipeline_tables
+
+
+def same_frame(expected, actual):
+    if list(expected.columns) != list(actual.columns) or len(expected) != len(actual):
+        return False
+    for column in expected.columns:
+        if expected[column].dtype.kind == 'f':
+            if not np.allclose(expected[column], actual[column], rtol=0, atol=1e-9, equal_nan=True):
+                return False
+        elif not expected[column].equals(actual[column]):
+            return False
+    return True
+
+
+def timed(function, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        timings.append(time.perf_counter() - start)
+    return result, float(np.median(timings)) * 1000
+
+
+def bench_table(source, directory, repeat, scale):
+    name = os.path.basename(source)
+    data = read_table(source)
+    if scale > 1:
+        data = pd.concat([data] * scale, ignore_index=True)
+    path = os.path.join(directory, name)
+    print(f"\n{name}: {len(data)}행 x {len(data.columns)}열")
+    print(f"{'format':<8} {'write_ms':>9} {'read_ms':>9} {'cast_ms':>9} {'size_kb':>9} {'same':>6}")
+    results = {}
+    for target in ['json', 'parquet', 'feather']:
+        os.environ["PIPELINE_STORAGE"] = target
+        _, write_ms = timed(lambda: write_table(data, path, storage=target, export_json=False), repeat)
+        # parquet/feather 는 JSON 을 읽은 결과에 같은 타입 정리(typed_frame)를 한 것과 비교
+        # (예: 숫자/문자열이 섞인 컬럼은 문자열로 저장됨)
+        loaded, read_ms = timed(lambda: read_table(path), repeat)
+        _, cast_ms = timed(lambda: read_table(path, columns=['cast']), repeat)
+        results[target] = loaded
+        same = target == 'json' or same_frame(storage.typed_frame(results['json']), loaded)
+        size_kb = os.path.getsize(format_path(path, target)) / 1024
+        print(f"{target:<8} {write_ms:>9.1f} {read_ms:>9.1f} {cast_ms:>9.1f} {size_kb:>9.0f} {str(same):>6}")
+        os.remove(format_path(path, target))
+
+
+def bench_startup(repeat):
+    """앱 시작 시 읽는 경로: 기준 데이터 로드 + 배우 목록"""
+    from recommend import Recommender
+    print(f"\n앱 시작 경로 (실제 data_modules 파일)")
+    print(f"{'format':<8} {'reference_ms':>13} {'actor_list_ms':>14}")
+    for target in ['json', 'parquet']:
+        os.environ["PIPELINE_STORAGE"] = target
+        recommender = Recommender()
+        _, reference_ms = timed(recommender.load_reference_data, repeat)
+        _, actors_ms = timed(lambda: read_table(storage.config.df_with_negatives_path, columns=['cast'])['cast'].unique(), repeat)
+        print(f"{target:<8} {reference_ms:>13.1f} {actors_ms:>14.1f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="중간 데이터 저장 형식 벤치마크")
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--scale', type=int, default=1, help="행 복제 배수")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        for source in pipeline_tables:
+            if storage.table_exists(source):
+                bench_table(source, directory, args.repeat, args.scale)
+    if all(os.path.exists(format_path(path, 'parquet')) for path in pipeline_tables[1:]):
+        bench_startup(args.repeat)
+    else:
+        print("\n앱 시작 경로 측정 생략: python app/utils/storage.py 로 parquet 변환 후 실행")
@@ -22,11 +22,11 @@ if config_dir not in sys.path:
     sys.path.append(config_dir)
 
 import config
-import pandas as pd
+from utils.storage import read_table
 from langchain_core.agents import AgentFinish
 
-# JSON 파일에서 배우 목록 생성
-df = pd.read_json(config.df_with_negatives_path, lines=True, encoding="utf-8")
+# 학습 데이터에서 배우 목록 생성 (cast 컬럼만 읽음)
+df = read_table(config.df_with_negatives_path, columns=["cast"])
 cast_list = list(df["cast"].dropna().unique())
 
 # 커스텀 프롬프트 정의
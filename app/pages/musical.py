@@ -1,9 +1,6 @@
 import streamlit as st
 from components.sidebar import add_custom_sidebar, button_style, render_button
-import pandas as pd
 import itertools
-import importlib.util   
-import time
 from hgtk.text import decompose, compose
 import sys
 import os
@@ -16,8 +13,8 @@ sys.path.append(main_dir)
 utils_dir = os.path.abspath(os.path.join(current_dir, "../utils"))
 sys.path.append(utils_dir)
 
-from utils.All_Musical_Process import Musical_Process
-from utils.recommend import Recommender
+from utils.pipeline_worker import start_if_idle, read_status, status_progress
+from utils.recommender_service import RecommenderService
 import config
 
 """기본 틀"""
@@ -56,37 +53,41 @@ st.markdown("""
 """, unsafe_allow_html=True)
 
 
-# Musical_Process 실행 함수
-def run_musical_process():
-    try:
-        # All_Musical_Process.py 경로 설정
-        script_path = os.path.abspath(os.path.join(os.path.dirname(__file__), "../utils/All_Musical_Process.py"))
-        # 모듈 로드 및 실행
-        spec = importlib.util.spec_from_file_location("All_Musical_Process", script_path)
-        all_musical_module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(all_musical_module)
-    except Exception as e:
-        st.error(f"`All_Musical_Process.py` 실행 중 오류 발생: {e}")
-        raise
-
-# 로딩 화면 표시 함수
-def show_loading_screen():
-    # 빈 컨테이너 생성
-    placeholder = st.empty()
-    # 스피너 표시
-    with placeholder.container():
-        with st.spinner("로딩 중... 잠시만 기다려주세요(처음에는 로딩이 길어질 수 있습니다.)"):
-            run_musical_process()
-            output_file_path = config.df_with_negatives_path
-            timeout = 30  # 최대 대기 시간 (초)
-            elapsed = 0
-            while not os.path.exists(output_file_path) and elapsed < timeout:
-                time.sleep(1)
-                elapsed += 1
-    print(elapsed)
-    placeholder.empty()
-
-show_loading_screen()
+# 학습 파이프라인은 별도 작업 프로세스에서 실행 (페이지는 상태 파일만 읽고, 작업 중에는 이전 모델로 추천)
+def start_background_pipeline():
+    # 페이지 실행마다 확인: 작업 중이 아니고 마지막 작업이 끝난 지 일정 시간이 지났으면 다시 시작
+    # (바뀐 입력이 없으면 모든 단계를 건너뛰므로, 서버 실행 뒤 새로 들어온 데이터도 반영됨)
+    process = start_if_idle()
+    if process:
+        print(f"파이프라인 작업 시작 (pid {process.pid})")
+    return process is not None
+
+# 파이프라인 진행 상황 표시 함수
+def show_pipeline_status(initial_state):
+    status = read_status()
+    if status['state'] in ('starting', 'running'):
+        done, total = status_progress(status)
+        running = [name for name, state in status['stages'].items() if state == 'running']
+        st.progress(done / total if total else 0.0,
+                    text=f"모델 업데이트 중 ({done}/{total}) {', '.join(running)}")
+    elif status['state'] == 'failed':
+        st.warning(f"모델 업데이트 실패: {status.get('error')}")
+    # 작업이 끝나면 새 모델로 페이지 갱신
+    if initial_state in ('starting', 'running') and status['state'] in ('done', 'failed'):
+        st.rerun()
+
+start_background_pipeline()
+pipeline_state = read_status()['state']
+# 작업 중일 때만 3초마다 상태 파일 확인 (페이지 전체는 다시 실행하지 않음)
+st.fragment(run_every=3 if pipeline_state in ('starting', 'running') else None)(show_pipeline_status)(pipeline_state)
+
+# 처음 실행: 서빙할 모델이 아직 없으면 기다리지 않고 안내만 표시 (작업이 끝나면 위 상태 표시가 페이지를 갱신)
+if not RecommenderService.get().ready():
+    st.info("처음 실행 중입니다. 모델 준비가 끝나면 자동으로 추천 화면이 열립니다.")
+    st.stop()
+
+# 공유 추천 서비스 준비 (프로세스당 한 번만 로드)
+RecommenderService.get().warmup()
 
 # 메인 페이지 제목
 st.markdown("# 뮤지컬 chat")
@@ -101,17 +102,13 @@ st.markdown("""
 
 # 배우 데이터 로드
 @st.cache_data
-def load_actor_list():
-    file = config.df_with_negatives_path
-    if not os.path.exists(file):
-        raise FileNotFoundError(f"파일을 찾을 수 없습니다: {file}")
-    
-    add_genre_file = pd.read_json(file, lines=True)
-    
-    actor_list = add_genre_file["cast"].tolist()
+def load_actor_list(model_version):
+    # model_version: 모델 저장소 버전이 바뀌면 목록을 다시 읽도록 캐시 키로 사용
+    # 학습 데이터 대신 현재 서빙 중인 모델(레이블 인코더)의 배우 목록 사용
+    actor_list = RecommenderService.get().actor_list()
     return sorted(actor_list)
 
-actor_list = load_actor_list()
+actor_list = load_actor_list(RecommenderService.get().warmup().model_version)
 
 st.markdown("## 배우와 장르 선택")
 
@@ -206,14 +203,8 @@ if st.button("추천받기", key="run_button"):
     else:
         with st.spinner("추천 결과를 생성하는 중입니다... 잠시만 기다려주세요."):
             try:
-                recommender = Recommender()
-                recommender.load_data()
-                recommender.load_model()
-                recommender.load_reference_data()
-                
-                
                 genre_id = genre_choice
-                recommendations = recommender.recommend(st.session_state["selected_actor"], genre_id)
+                recommendations = RecommenderService.get().recommend(st.session_state["selected_actor"], genre_id)
 
                 if not recommendations.empty:
                     st.markdown("### 추천된 뮤지컬 목록")
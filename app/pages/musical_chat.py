@@ -18,12 +18,11 @@ utils_dir = os.path.abspath(os.path.join(current_dir, "../utils"))
 sys.path.append(utils_dir)
 
 import config
-from utils.recommend import Recommender
+from utils.recommender_service import RecommenderService
 from components.tool_module import tools
 from langgraph.prebuilt.tool_node import ToolNode
 from datetime import datetime
 import json
-import pandas as pd
 import requests
 from bs4 import BeautifulSoup
 from selenium import webdriver
@@ -37,15 +36,8 @@ import time
 
 tool_executor = ToolNode(tools)
 
-# add_genre_story.json 데이터 로드
-file_path = f"{config.file_path}/{config.add_genre_file_name}"
-add_genre_data = pd.read_json(file_path, lines=True)
-
-# Recommender 초기화
-recommender = Recommender()
-recommender.load_model()
-recommender.load_data()
-recommender.load_reference_data()
+# 공유 추천 서비스 (모든 세션/페이지가 같은 인스턴스를 사용)
+recommender = RecommenderService.get().warmup()
 
 # Streamlit 세션 초기화
 if "chat_sessions" not in st.session_state:
@@ -220,11 +212,9 @@ if current_session:
 
                 else:
 
-                    current_date = datetime.now().strftime('%Y.%m.%d')
-                    matched_recommendations = add_genre_data[
-                        (add_genre_data['title'].isin(top_titles)) &
-                        (add_genre_data['end_date'] > current_date)
-                    ]
+                    # 종료일 인덱스로 미리 걸러진 상영 중 데이터 사용
+                    active_data = recommender.active_reference_data()
+                    matched_recommendations = active_data[active_data['title'].isin(top_titles)]
 
                     if matched_recommendations.empty:
                         with st.chat_message("assistant"):
@@ -1,4 +1,3 @@
-import subprocess
 import sys
 import os
 # 현재 디렉토리 경로
@@ -12,50 +11,135 @@ if main_dir not in sys.path:
     sys.path.append(main_dir)
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config
+from recommendation_cache import artifact_version
+from storage import table_exists, sync_table, pipeline_tables
+from pipeline import Stage, Pipeline
 
+processed_data_file_path = f'{config.file_path}/{config.processed_data}'
+add_genre_file_path = f'{config.file_path}/{config.add_genre_file_name}'
+score_table_files = [os.path.join(config.score_table_path, name) for name in ["triples.npy", "scores.npy", "ids.json"]]
+
+
+"""단계별 실행 함수 (changed: 마지막 실행 이후 바뀐 입력 키 목록, 무거운 모듈은 단계가 실행될 때만 import)"""
+def first_preprocessing(changed):
+    """처음 전처리 per+raw.json -> processed_data"""
+    from first_preprocessing import F_Preprocessing
+    F_Preprocessing().run()
+
+
+def genre_prompt(changed):
+    """장르 추가 processed_data -> add_genre_story"""
+    import prompt
+    prompt.main()
+
+
+def preprocessing(changed):
+    """전처리 add_genre_story -> df_with_negatives"""
+    from preprocessing import Preprocessing
+    Preprocessing().run()
+
+
+def train_model(changed):
+    """모델 생성: 모델이 없거나 학습 코드가 바뀌면 운영 학습, 학습 데이터만 바뀌면 기존 모델에서 이어서 학습 (추가/변경된 행만)
+    이전 실행 기록이나 학습 기록(레이블 인코더 / 학습 행)이 없는 기존 모델은 이어서 학습하지 않고,
+    현재 학습 데이터와 맞으면 그대로 사용(인코더/학습 행 기록 생성), 맞지 않으면 운영 학습"""
+    from DeepFM import MusicalRecommender, TrainingConfig
+    recommender = MusicalRecommender(training_config=TrainingConfig(headless=True))
+    if not os.path.exists(config.save_model_path) or any(key.startswith("code:") for key in changed or []):
+        recommender.run()
+    elif changed is None or not os.path.exists(config.label_encoder_path) or not os.path.exists(config.trained_rows_path):
+        if recommender.adopt_existing_model():
+            print("기존 모델 사용: 레이블 인코더/학습 행 기록 생성")
+        else:
+            recommender.run()
+    elif config.df_with_negatives_path in changed:
+        recommender.warm_start()
+
+    if not os.path.exists(config.numpy_model_path) or os.path.getmtime(config.numpy_model_path) < os.path.getmtime(config.save_model_path):
+        from numpy_model import export_numpy_model
+        export_numpy_model()
+
+
+def score_table(changed):
+    """점수 테이블 생성 (모델/인코더/학습 데이터가 바뀌면 재생성)"""
+    from score_table import build_score_table
+    build_score_table()
+
+
+def recommend_cache(changed):
+    """추천 캐시 사전 계산 (현재 모델/기준 데이터 버전)"""
+    from recommendation_cache import precompute_cache
+    precompute_cache()
+
+
+def model_registry(changed):
+    """모델 저장소 등록 (학습 결과가 현재 서빙 버전과 다르면 새 버전 등록 후 CURRENT 교체)"""
+    from model_registry import publish_if_changed
+    publish_if_changed()
+
+
+def musical_stages():
+    """파이프라인 단계 선언: 입력이 다른 단계의 출력이면 그 단계 뒤에 실행, 서로 관계없는 단계는 동시에 실행"""
+    return [
+        Stage("first_preprocessing", first_preprocessing,
+              inputs=[f'{config.file_path}/{config.per_raw}'],
+              outputs=[processed_data_file_path],
+              code=["first_preprocessing.py"]),
+        Stage("prompt", genre_prompt,
+              inputs=[processed_data_file_path],
+              outputs=[add_genre_file_path],
+              code=["prompt.py"]),
+        Stage("preprocessing", preprocessing,
+              inputs=[add_genre_file_path],
+              outputs=[config.df_with_negatives_path],
+              code=["preprocessing.py"]),
+        Stage("DeepFM", train_model,
+              inputs=[config.df_with_negatives_path],
+              outputs=[config.save_model_path, config.label_encoder_path, config.numpy_model_path],
+              code=["DeepFM.py", "encoder_artifact.py", "numpy_model.py", "ranking_evaluation.py", "storage.py"]),
+        Stage("score_table", score_table,
+              inputs=[config.numpy_model_path, config.label_encoder_path, config.df_with_negatives_path],
+              outputs=score_table_files,
+              code=["score_table.py", "recommend.py"]),
+        Stage("recommend_cache", recommend_cache,
+              inputs=[config.label_encoder_path, *score_table_files, add_genre_file_path],
+              outputs=[lambda: os.path.join(config.recommend_cache_path, f"{artifact_version()}.parquet")],
+              code=["recommendation_cache.py", "recommend.py"]),
+        Stage("model_registry", model_registry,
+              inputs=[config.save_model_path, config.numpy_model_path, config.label_encoder_path, *score_table_files],
+              outputs=[os.path.join(config.model_registry_path, "CURRENT")],
+              code=["model_registry.py", "ranking_evaluation.py"]),
+    ]
 
 
 class Musical_Process:
-    def execute_script(self, script_name):
-        # 현재 파일 기준으로 스크립트 경로 설정
-        script_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), script_name)
-        # 가상환경의 Python 실행 경로 가져오기
-        venv_python = sys.executable
-        try:
-            subprocess.run([venv_python, script_path], check=True)
-        except subprocess.CalledProcessError as e:
-            print(f"Error occurred while executing {script_name}: {e}")
-            raise
+    def __init__(self, workers=2, progress=None):
+        self.workers = workers  # 동시에 실행할 수 있는 단계 수
+        self.progress = progress  # 단계별 진행 상황 콜백 progress(name, state)
 
-if __name__ == "__main__":
-    processed_data_file_path = f'{config.file_path}/{config.processed_data}'
-    add_genre_file_path = f'{config.file_path}/{config.add_genre_file_name}'
+    def sync_storage(self):
+        """중간 데이터 형식 변환 (JSON 만 있거나 JSON 이 더 최신이면 설정된 parquet/feather 로 변환)"""
+        for path in pipeline_tables:
+            if table_exists(path) and sync_table(path):
+                print(f"storage sync: {os.path.basename(path)}")
 
-    process = Musical_Process() 
+    def plan(self):
+        """실행하지 않고 단계별 예상 결과 (run / pass / adopt / missing)"""
+        self.sync_storage()
+        return Pipeline(musical_stages(), workers=self.workers).plan()
 
-    """처음 전처리 코드 per+raw.json -> processed_data.json"""
-    if not os.path.exists(processed_data_file_path):
-        process.execute_script("first_preprocessing.py")
-    else:
-        print('pass first_preprocessing')
-     
-    """장르 추가 실행 조건 processed_data.json -> add_genre_story.json"""
-    if not os.path.exists(add_genre_file_path):
-        process.execute_script("prompt.py")
-    else:
-        print('pass prompt')
-        pass
+    def run(self):
+        """입력/코드가 바뀐 단계만 한 프로세스 안에서 실행 (단계별 결과 반환)"""
+        self.sync_storage()
+        return Pipeline(musical_stages(), workers=self.workers, progress=self.progress).run()
 
-    """전처리 코드 실행 조건 add_genre_story.json -> df_with_negatives.json"""
-    if not os.path.exists(config.df_with_negatives_path):
-        process.execute_script("preprocessing.py")
-    else:
-        print('pass Preprocessing')
-            
-    """모델 생성 실행 조건"""
-    if not os.path.exists(config.save_model_path):
-        # print("DeepFM 실행")
-        process.execute_script("DeepFM.py")
+
+if __name__ == "__main__":
+    # --dry-run: 실행하지 않고 단계별 예상 결과만 출력, --workers N: 동시에 실행할 단계 수
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 2
+    process = Musical_Process(workers=workers)
+    if "--dry-run" in sys.argv:
+        for name, decision in process.plan().items():
+            print(f"{name}: {decision}")
     else:
-        print('pass model')
-        pass
+        process.run()
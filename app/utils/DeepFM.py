@@ -3,34 +3,84 @@ import pandas as pd
 import numpy as np
 from sklearn.preprocessing import LabelEncoder
 from sklearn.model_selection import train_test_split
-from tensorflow.keras.models import Model
+from tensorflow.keras.models import Model, load_model
 from tensorflow.keras.layers import Input, Embedding, Dense, Concatenate, Flatten, Add, Lambda, Dropout
 import tensorflow as tf
 from tensorflow.keras import backend as K
 from keras.layers import Layer
-import matplotlib.pyplot as plt
-from tensorflow.keras.callbacks import EarlyStopping
+from tensorflow.keras.callbacks import EarlyStopping, Callback
+from tensorflow.keras.optimizers import Adam
 from tensorflow.keras.saving import register_keras_serializable
 from tensorflow.keras.regularizers import l2
+from tensorflow.keras import mixed_precision
+import json
+import time
+from dataclasses import dataclass
+from datetime import datetime
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config
+from encoder_artifact import EncoderArtifact, hash_bucket
+from numpy_model import NumpyDeepFM
+from ranking_evaluation import RankingEvaluation
+from storage import read_table, iter_table
+
+@dataclass
+class TrainingConfig:
+    """학습 실행 방식 설정 (headless=True: 운영 학습 - 그래프 없이 JSON 로그, 한 번의 학습 일정)"""
+    headless: bool = False
+    metrics_log_path: str = config.train_metrics_path  # 에포크/이벤트별 JSON lines 로그
+    refit: bool = False         # headless: 학습 후 전체 데이터로 이어서 재학습할지
+    refit_epochs: int = None    # 재학습 에포크 수 (None 이면 검증 손실이 가장 좋았던 에포크 수)
+
 
 # MusicalRecommender 클래스 정의
 class MusicalRecommender:
-    def __init__(self):
+    # 모델 구조/학습 하이퍼파라미터 기본값 (sweep.py 에서 조합별로 덮어씀)
+    default_params = {
+        'embedding_dim': 16,
+        'hidden_units': [128, 64, 32],
+        'dropout': 0.3,
+        'l2': 1e-4,
+        'batch_size': 64,
+        'epochs': 20,
+        'learning_rate': 1e-3,
+        'jit_compile': False,
+        'mixed_precision': False,  # True: mixed_bfloat16 학습 (출력층과 저장하는 모델은 float32)
+    }
+    xla_supported = None  # XLA 컴파일 가능 여부 (프로세스에서 처음 확인할 때 한 번만 검사)
+
+    def __init__(self, streaming=False, chunk_size=8192, shuffle_buffer=100000, hash_buckets=None, params=None,
+                 cpu_profile=False, training_config=None):
         self.data = None
         self.original_data = None
         self.model = None
         self.label_encoders = {}
         self.vocab_sizes = {}
+        # streaming=True: 데이터를 DataFrame 으로 올리지 않고 tf.data 로 나눠 읽으며 학습
+        self.streaming = streaming
+        self.chunk_size = chunk_size          # JSON lines 를 한 번에 읽는 행 수
+        self.shuffle_buffer = shuffle_buffer  # 셔플 버퍼 크기 (메모리 사용량 상한)
+        # 해싱 모드 {컬럼: 버킷 수}: 임베딩 크기를 고정하고 처음 보는 값도 버킷으로 매핑
+        self.hash_buckets = hash_buckets or {}
+        self.requested_params = params or {}
+        self.params = {**self.default_params, **self.requested_params}
+        self.num_examples = None
+        self.ranking_report = None  # 이번 학습의 랭킹 평가 (save_model 에서 저장한 모델과 함께 기록)
+        # cpu_profile=True: CPU 전용 학습 설정 (스레드, 큰 배치 + 학습률 스케일링, 가능하면 XLA / bfloat16)
+        self.cpu_profile = cpu_profile
+        self.throughput = None
+        self.training = training_config or TrainingConfig()
+        if cpu_profile:
+            self.configure_cpu_threads()
     
     def load_and_preprocess_data(self):
         # 데이터 로드 및 전처리
         # Load data (Ensure the file is in the same directory or provide correct relative path)
-        self.data = pd.read_json(config.df_with_negatives_path, lines=True)  # Update the path to a relative one if necessary
+        self.data = read_table(config.df_with_negatives_path)  # parquet/feather 가 있으면 그 파일, 없으면 JSON lines
         self.original_data = self.data.copy()
+        self.num_examples = len(self.data)
         
         categorical_features = ['title', 
                                 'cast', 
@@ -41,6 +91,132 @@ class MusicalRecommender:
             self.label_encoders[feature] = LabelEncoder()
             self.data[feature] = self.label_encoders[feature].fit_transform(self.data[feature].astype(str))
             self.vocab_sizes[feature] = len(self.label_encoders[feature].classes_)
+            if feature in self.hash_buckets:
+                self.data[feature] = hash_bucket(self.original_data[feature].astype(str), self.hash_buckets[feature])
+                self.vocab_sizes[feature] = self.hash_buckets[feature] + 1
+
+    def iter_chunks(self):
+        """df_with_negatives 를 chunk_size 행씩 읽음"""
+        yield from iter_table(config.df_with_negatives_path, self.chunk_size)
+
+    def build_vocabulary(self):
+        """스트리밍 모드: 전체를 올리지 않고 한 번 훑어서 LabelEncoder 와 같은(정렬) 순서의 인코더 생성"""
+        categorical_features = ['title', 
+                                'cast', 
+                                'genre']
+        values = {feature: set() for feature in categorical_features}
+        self.num_examples = 0
+        for chunk in self.iter_chunks():
+            self.num_examples += len(chunk)
+            for feature in categorical_features:
+                values[feature].update(chunk[feature].astype(str).unique())
+
+        for feature in categorical_features:
+            self.label_encoders[feature] = LabelEncoder()
+            self.label_encoders[feature].classes_ = np.array(sorted(values[feature]), dtype=object)
+            self.vocab_sizes[feature] = len(self.label_encoders[feature].classes_)
+            if feature in self.hash_buckets:
+                self.vocab_sizes[feature] = self.hash_buckets[feature] + 1
+
+    def generate_examples(self, subset):
+        """chunk 단위로 읽어 즉석에서 레이블 인코딩 (subset: train / validation / all)"""
+        categorical_features = ['title', 
+                                'cast', 
+                                'genre']
+        lookups = {feature: {value: idx for idx, value in enumerate(self.label_encoders[feature].classes_)}
+                   for feature in categorical_features}
+        offset = 0
+        for chunk in self.iter_chunks():
+            # 행 번호 기준 고정 분할: 5행 중 1행을 검증용 (test_size=0.2 와 같은 비율)
+            row_index = np.arange(offset, offset + len(chunk))
+            offset += len(chunk)
+            if subset == 'train':
+                chunk = chunk[row_index % 5 != 0]
+            elif subset == 'validation':
+                chunk = chunk[row_index % 5 == 0]
+
+            features = tuple(np.asarray(hash_bucket(chunk[feature].astype(str), self.hash_buckets[feature])
+                                        if feature in self.hash_buckets else chunk[feature].astype(str).map(lookups[feature]),
+                                        dtype=np.int32).reshape(-1, 1)
+                             for feature in categorical_features)
+            yield features, chunk['target'].to_numpy(dtype=np.float32).reshape(-1, 1)
+
+    def subset_size(self, subset):
+        """subset 의 행 수 (generate_examples 와 같은 행 번호 기준 분할: 5행 중 1행이 검증용)"""
+        validation_examples = (self.num_examples + 4) // 5
+        return {'train': self.num_examples - validation_examples, 'validation': validation_examples,
+                'all': self.num_examples}[subset]
+
+    def make_dataset(self, subset, shuffle=True):
+        """스트리밍 입력 파이프라인: 읽기 -> 인코딩 -> 셔플 -> 배치 -> prefetch
+        generator 는 길이를 알 수 없으므로 build_vocabulary 에서 센 행 수로 cardinality 를 지정
+        (Keras 진행 표시/에포크 스텝 수, 행 수가 다르면 읽는 중 오류)"""
+        feature_spec = tf.TensorSpec(shape=(None, 1), dtype=tf.int32)
+        dataset = tf.data.Dataset.from_generator(
+            lambda: self.generate_examples(subset),
+            output_signature=((feature_spec, feature_spec, feature_spec),
+                              tf.TensorSpec(shape=(None, 1), dtype=tf.float32))
+        ).unbatch().apply(tf.data.experimental.assert_cardinality(self.subset_size(subset)))
+        if shuffle:
+            dataset = dataset.shuffle(self.shuffle_buffer, seed=42, reshuffle_each_iteration=True)
+        return dataset.batch(self.params['batch_size']).prefetch(tf.data.AUTOTUNE)
+
+    @staticmethod
+    def configure_cpu_threads(intra_op_threads=None, inter_op_threads=2):
+        """연산 내부 스레드 = CPU 코어 수, 연산 간 스레드는 작게 (TensorFlow 초기화 전에만 적용 가능)"""
+        try:
+            tf.config.threading.set_intra_op_parallelism_threads(intra_op_threads or os.cpu_count() or 1)
+            tf.config.threading.set_inter_op_parallelism_threads(inter_op_threads)
+        except RuntimeError as e:
+            print(f"TensorFlow 스레드 설정 실패 (기본값 사용): {e}")
+
+    @staticmethod
+    def xla_available():
+        """학습 스텝과 같은 종류의 연산(gather, matmul, sigmoid, 기울기)을 jit_compile=True 로 실행해 보고 XLA 사용 가능 여부 반환"""
+        if MusicalRecommender.xla_supported is None:
+            @tf.function(jit_compile=True)
+            def probe(ids, weights):
+                with tf.GradientTape() as tape:
+                    tape.watch(weights)
+                    output = tf.sigmoid(tf.matmul(tf.gather(weights, ids), weights, transpose_b=True))
+                    loss = tf.reduce_mean(output)
+                return tape.gradient(loss, weights)
+            try:
+                probe(tf.constant([0, 1]), tf.ones((2, 4)))
+                MusicalRecommender.xla_supported = True
+            except Exception as e:
+                print(f"XLA 사용 불가, jit_compile=False 로 학습: {e}")
+                MusicalRecommender.xla_supported = False
+        return MusicalRecommender.xla_supported
+
+    @staticmethod
+    def bf16_supported():
+        """CPU 가 bfloat16 연산 명령(AVX512_BF16 / AMX_BF16)을 지원하는지 (/proc/cpuinfo 가 없으면 False)"""
+        try:
+            with open('/proc/cpuinfo', 'r') as file:
+                flags = file.read()
+        except OSError:
+            return False
+        return 'avx512_bf16' in flags or 'amx_bf16' in flags
+
+    def apply_cpu_profile(self, train_examples):
+        """학습 데이터 크기에 맞춰 배치 크기를 키우고 학습률을 배치 비율의 제곱근만큼 스케일링, XLA 는 이 환경에서 가능할 때만 사용
+        params 로 직접 지정한 값은 그대로 둠. mixed_bfloat16 은 params['mixed_precision']=True 로 지정할 때만 사용
+        (지원하지 않는 CPU 에서는 float32 로 변환하며 계산되어 오히려 느려짐)"""
+        base_batch = self.default_params['batch_size']
+        # 에포크당 약 32 스텝이 되도록 2의 거듭제곱으로 (64 ~ 2048)
+        batch_size = int(np.clip(2 ** int(np.log2(max(train_examples // 32, 1))), base_batch, 2048))
+        if 'batch_size' not in self.requested_params:
+            self.params['batch_size'] = batch_size
+        if 'learning_rate' not in self.requested_params:
+            self.params['learning_rate'] = self.default_params['learning_rate'] * float(
+                np.sqrt(self.params['batch_size'] / base_batch))
+        self.params['jit_compile'] = self.requested_params.get('jit_compile', True) and self.xla_available()
+        if self.params['mixed_precision'] and not self.bf16_supported():
+            print("CPU 가 bfloat16 연산을 지원하지 않음: mixed_bfloat16 학습이 float32 보다 느릴 수 있음")
+        print(f"CPU 프로파일: batch_size={self.params['batch_size']}, learning_rate={self.params['learning_rate']:.5f}, "
+              f"XLA {'사용' if self.params['jit_compile'] else '미사용'}, "
+              f"{'mixed_bfloat16' if self.params['mixed_precision'] else 'float32'}")
 
     def prepare_training_data(self):
         # 범주형 데이터와 수치형 데이터를 처리
@@ -82,6 +258,10 @@ class MusicalRecommender:
 
 
     def create_deepfm_model(self):
+        # mixed_bfloat16: 층을 만드는 동안만 전역 정책 변경 (연산은 bfloat16, 가중치는 float32)
+        previous_policy = mixed_precision.global_policy()
+        if self.params['mixed_precision']:
+            mixed_precision.set_global_policy('mixed_bfloat16')
         # 모델 구조 정의
         inputs = {
             'title': Input(shape=(1,), dtype=tf.int32, name='title'),
@@ -90,11 +270,13 @@ class MusicalRecommender:
             # 'percentage': Input(shape=(1,), dtype=tf.float32, name='percentage'),
             # 'ticket_price': Input(shape=(1,), dtype=tf.float32, name='ticket_price')
         }
+        embedding_dim = self.params['embedding_dim']
+        l2_weight = self.params['l2']
         # 임베딩 정의 (L2 정규화 추가)
         embeddings = {
-            'title': Embedding(self.vocab_sizes['title'], 16, embeddings_regularizer=l2(1e-4))(inputs['title']),
-            'cast': Embedding(self.vocab_sizes['cast'], 16, embeddings_regularizer=l2(1e-4))(inputs['cast']),
-            'genre': Embedding(self.vocab_sizes['genre'], 16, embeddings_regularizer=l2(1e-4))(inputs['genre']),
+            'title': Embedding(self.vocab_sizes['title'], embedding_dim, embeddings_regularizer=l2(l2_weight))(inputs['title']),
+            'cast': Embedding(self.vocab_sizes['cast'], embedding_dim, embeddings_regularizer=l2(l2_weight))(inputs['cast']),
+            'genre': Embedding(self.vocab_sizes['genre'], embedding_dim, embeddings_regularizer=l2(l2_weight))(inputs['genre']),
         }
     
         fm_output = FMInteraction()([embeddings['title'], 
@@ -112,12 +294,15 @@ class MusicalRecommender:
         ])
         
         # 완전 연결 계층 (Dense 레이어 L2 정규화 추가)
-        x = Dense(128, activation='relu', kernel_regularizer=l2(1e-4))(concatenated)
-        x = Dropout(0.3)(x)
-        x = Dense(64, activation='relu', kernel_regularizer=l2(1e-4))(x)
-        x = Dropout(0.3)(x)
-        x = Dense(32, activation='relu', kernel_regularizer=l2(1e-4))(x)
-        output = Dense(1, activation='sigmoid', kernel_regularizer=l2(1e-4))(x)
+        # (기본값: 128 -> Dropout -> 64 -> Dropout -> 32)
+        x = concatenated
+        hidden_units = self.params['hidden_units']
+        for i, units in enumerate(hidden_units):
+            x = Dense(units, activation='relu', kernel_regularizer=l2(l2_weight))(x)
+            if i < len(hidden_units) - 1:
+                x = Dropout(self.params['dropout'])(x)
+        # 출력층은 항상 float32 (sigmoid/손실을 bfloat16 으로 계산하면 확률이 0/1 근처에서 뭉개짐)
+        output = Dense(1, activation='sigmoid', kernel_regularizer=l2(l2_weight), dtype='float32')(x)
 
         self.model = Model(inputs=[inputs['title'],
                                 inputs['cast'], 
@@ -125,12 +310,24 @@ class MusicalRecommender:
                                 # inputs['percentage'],
                                 # inputs['ticket_price']
                                 ], outputs=output)
-        self.model.compile(optimizer='adam', loss=weighted_loss, metrics=['accuracy', 'Precision', 'Recall'])
+        mixed_precision.set_global_policy(previous_policy)
+        self.model.compile(optimizer=Adam(learning_rate=self.params['learning_rate']), loss=weighted_loss,
+                           metrics=['accuracy', 'Precision', 'Recall'], jit_compile=self.params['jit_compile'])
         self.model.summary()
 
     def train_model(self):
-        X_train, X_test, y_train, y_test = self.prepare_training_data()
+        if self.streaming:
+            train_examples = self.subset_size('train')
+        else:
+            X_train, X_test, y_train, y_test = self.prepare_training_data()
+            train_examples = len(X_train)
+        if self.cpu_profile:
+            self.apply_cpu_profile(train_examples)
         self.create_deepfm_model()
+        self.throughput = ThroughputLogger(train_examples, self.params['batch_size'])
+        callbacks = [self.throughput]
+        if self.training.headless:
+            callbacks.append(JsonMetricsLogger(self.training.metrics_log_path, 'train', self.throughput))
 
         # EarlyStopping 콜백 정의
         early_stopping = EarlyStopping(
@@ -140,26 +337,41 @@ class MusicalRecommender:
         )
         
         # Train the model and display progress
-        history = self.model.fit(
-            [X_train['title'], 
-            X_train['cast'],
-            X_train['genre'], 
-            # X_train['percentage'],
-            # X_train['ticket_price']
-            ],
-            y_train,
-            batch_size=64,
-            epochs=20,
-            verbose=1,
-            validation_data=([X_test['title'],
-                            X_test['cast'], 
-                            X_test['genre'], 
-                            # X_test['percentage'],
-                            # X_test['ticket_price']
-                            ], y_test),
-            callbacks=[early_stopping]  
-        )
-        # Plot training history
+        if self.streaming:
+            history = self.model.fit(
+                self.make_dataset('train'),
+                epochs=self.params['epochs'],
+                verbose=1,
+                validation_data=self.make_dataset('validation', shuffle=False),
+                callbacks=[early_stopping] + callbacks
+            )
+        else:
+            history = self.model.fit(
+                [X_train['title'], 
+                X_train['cast'],
+                X_train['genre'], 
+                # X_train['percentage'],
+                # X_train['ticket_price']
+                ],
+                y_train,
+                batch_size=self.params['batch_size'],
+                epochs=self.params['epochs'],
+                verbose=1,
+                validation_data=([X_test['title'],
+                                X_test['cast'], 
+                                X_test['genre'], 
+                                # X_test['percentage'],
+                                # X_test['ticket_price']
+                                ], y_test),
+                callbacks=[early_stopping] + callbacks
+            )
+        if self.training.headless:
+            ranking = None if self.streaming else self.evaluate_ranking(X_train, X_test, y_train, y_test)
+            self.finish_headless(history, ranking)
+            return
+
+        # Plot training history (운영 학습이 아닐 때만 matplotlib 사용)
+        import matplotlib.pyplot as plt
         plt.plot(history.history['accuracy'], label='accuracy')
         plt.plot(history.history['val_accuracy'], label = 'val_accuracy')
         plt.xlabel('Epoch')
@@ -167,9 +379,51 @@ class MusicalRecommender:
         plt.ylim([0, 1])
         plt.legend(loc='lower right')
         plt.savefig(config.picture_file_path)
+        if not self.streaming:
+            self.evaluate_ranking(X_train, X_test, y_train, y_test)
         self.retrain()
 
+    def finish_headless(self, history, ranking=None):
+        """운영 학습 마무리: 최적 에포크 기록, (선택) 전체 데이터로 이어서 재학습, 저장"""
+        log_path = self.training.metrics_log_path
+        best_epoch = int(np.argmin(history.history['val_loss'])) + 1
+        log_event(log_path, {'event': 'best_epoch', 'epoch': best_epoch,
+                             'val_loss': float(np.min(history.history['val_loss']))})
+        if ranking is not None:
+            log_event(log_path, {'event': 'ranking', **ranking['overall']})
+
+        if self.training.refit:
+            epochs = self.training.refit_epochs or best_epoch
+            callbacks = [JsonMetricsLogger(log_path, 'refit')]
+            if self.streaming:
+                self.model.fit(self.make_dataset('all'), epochs=epochs, verbose=2, callbacks=callbacks)
+            else:
+                self.model.fit([self.data['title'], self.data['cast'], self.data['genre']], self.data['target'],
+                               batch_size=self.params['batch_size'], epochs=epochs, verbose=2, callbacks=callbacks)
+
+        self.save_model(config.save_model_path)
+        log_event(log_path, {'event': 'saved', 'path': config.save_model_path})
+
+    def evaluate_ranking(self, X_train, X_test, y_train, y_test):
+        """전체 데이터 재학습 전에 검증 데이터로 배우별 HR@10, NDCG@10, MAP@10 평가 (장르별 포함)"""
+        if self.hash_buckets:
+            print("해싱 모드: 타이틀 id 가 해시 버킷이므로 랭킹 평가 생략")
+            return None
+        num_titles = self.vocab_sizes['title']
+        evaluation = RankingEvaluation(self.model, num_titles,
+                                       RankingEvaluation.title_genre_array(self.data, num_titles),
+                                       genre_names=[str(name) for name in self.label_encoders['genre'].classes_])
+        report = evaluation.evaluate(X_train.assign(target=y_train), X_test.assign(target=y_test))
+        report['params'] = self.params
+        self.ranking_report = report
+        print(json.dumps(report, ensure_ascii=False))
+        return report
+
     def retrain(self):
+        if self.streaming:
+            self.retrain_streaming()
+            return
+
         X_full = pd.DataFrame({
         'title': self.data['title'],
         'cast': self.data['cast'],
@@ -187,17 +441,18 @@ class MusicalRecommender:
             # X_full['ticket_price'],
             ],
             y_full,
-            batch_size=64,
+            batch_size=self.params['batch_size'],
             epochs=5,  # 전체 데이터로 재학습할 에포크 수
             verbose=1
         )
         print("Retraining completed.")
+        # 전체(학습) 데이터 기준 지표 - 검증 데이터 랭킹 평가는 evaluate_ranking() 결과 참고
         evaluation_results = self.model.evaluate(
             [X_full['title'],
             X_full['cast'],
             X_full['genre'],
-            X_full['percentage'],
-            X_full['ticket_price']
+            # X_full['percentage'],
+            # X_full['ticket_price']
             ],
             y_full, verbose=2
         )
@@ -215,11 +470,179 @@ class MusicalRecommender:
         print(f"Test Recall: {test_recall}")
 
 
+    def retrain_streaming(self):
+        """스트리밍 모드의 전체 데이터 재학습 (train + validation 전체를 다시 읽음)"""
+        self.model.fit(
+            self.make_dataset('all'),
+            epochs=5,  # 전체 데이터로 재학습할 에포크 수
+            verbose=1
+        )
+        print("Retraining completed.")
+        evaluation_results = self.model.evaluate(self.make_dataset('all', shuffle=False), verbose=2)
+        self.save_model(config.save_model_path)
+
+        print(f"Test Loss: {evaluation_results[0]}")
+        print(f"Test Accuracy: {evaluation_results[1]}")
+        print(f"Test Precision: {evaluation_results[2]}")
+        print(f"Test Recall: {evaluation_results[3]}")
+
+    @staticmethod
+    def row_hashes(data):
+        """학습 행 (cast, title, genre, target) 별 해시: 다음 학습 때 추가/변경된 행을 찾는 데 사용"""
+        return pd.util.hash_pandas_object(data[['cast', 'title', 'genre', 'target']].astype(str), index=False).to_numpy()
+
+    def trained_row_hashes(self):
+        if self.original_data is not None:
+            return self.row_hashes(self.original_data)
+        # 스트리밍 모드: 원본을 들고 있지 않으므로 다시 읽음
+        return np.concatenate([self.row_hashes(chunk) for chunk in self.iter_chunks()])
+
+    @staticmethod
+    def load_previous_model():
+        try:
+            return load_model(config.save_model_path, custom_objects={
+                "weighted_loss": weighted_loss,
+                "FMInteraction": FMInteraction
+            })
+        except (FileNotFoundError, OSError):
+            raise FileNotFoundError("이어서 학습할 기존 모델을 찾을 수 없음")
+
+    @staticmethod
+    def architecture_params(model):
+        """저장된 모델의 구조 파라미터 (embedding_dim, hidden_units, dropout, l2) - create_deepfm_model 로 같은 구조를 다시 만들 때 사용"""
+        embeddings = [layer for layer in model.layers if type(layer).__name__ == 'Embedding']
+        dense = [layer for layer in model.layers if type(layer).__name__ == 'Dense']
+        dropouts = [layer for layer in model.layers if type(layer).__name__ == 'Dropout']
+        params = {'embedding_dim': embeddings[0].output_dim, 'hidden_units': [layer.units for layer in dense[:-1]]}
+        if dropouts:
+            params['dropout'] = float(dropouts[0].rate)
+        if dense[0].kernel_regularizer is not None:
+            params['l2'] = float(dense[0].kernel_regularizer.get_config()['l2'])
+        return params
+
+    def adopt_existing_model(self, previous_model=None):
+        """학습 기록(레이블 인코더 / 학습 행) 없이 저장된 기존 모델을 현재 학습 데이터로 학습한 모델로 기록
+        현재 데이터로 만든 인코더가 모델 임베딩 크기(저장된 인코더가 있으면 그 값 목록)와 같을 때만 기록하고 True"""
+        previous_model = previous_model or self.load_previous_model()
+        data = read_table(config.df_with_negatives_path)
+        fitted = EncoderArtifact.fit(data)
+        exists = os.path.exists(config.label_encoder_path)
+        artifact = EncoderArtifact.load(config.label_encoder_path) if exists else fitted
+        embeddings = [layer for layer in previous_model.layers if type(layer).__name__ == 'Embedding']
+        model_sizes = {feature: layer.input_dim for feature, layer in zip(EncoderArtifact.columns, embeddings)}
+        if artifact.classes != fitted.classes or artifact.model_vocab_sizes != model_sizes:
+            return False
+        if not exists:
+            artifact.save(config.label_encoder_path)
+        np.save(config.trained_rows_path, self.row_hashes(data))
+        return True
+
+    def warm_start(self, epochs=3):
+        """기존 Recommend.h5 에서 이어서 학습: 새 title/cast 만큼 임베딩을 늘리고 추가/변경된 행으로만 미세 조정
+        이전 학습 기록(레이블 인코더 / 학습 행)이 없으면 추가/변경된 행을 알 수 없으므로 미세 조정하지 않고,
+        기존 모델이 현재 학습 데이터와 맞으면 학습 기록만 만들고, 맞지 않으면 전체 학습"""
+        previous_model = self.load_previous_model()
+        if not os.path.exists(config.label_encoder_path) or not os.path.exists(config.trained_rows_path):
+            if self.adopt_existing_model(previous_model):
+                print("이전 학습 기록 없음: 기존 모델을 현재 학습 데이터 기준으로 기록 (다음 warm start 부터 추가/변경된 행만 학습)")
+            else:
+                print("이전 학습 기록 없음 + 기존 모델이 현재 학습 데이터와 다름: 전체 학습")
+                self.run()
+            return
+        previous = EncoderArtifact.load(config.label_encoder_path)
+
+        self.data = read_table(config.df_with_negatives_path)
+        self.original_data = self.data.copy()
+        # 기존 모델이 해싱 모드면 같은 버킷 수로 이어서 학습 (임베딩 크기 고정)
+        self.hash_buckets = previous.hash_buckets
+
+        categorical_features = ['title', 
+                                'cast', 
+                                'genre']
+
+        # 기존 값 + 새 값 (LabelEncoder 와 같은 정렬 순서): 기존 값의 임베딩 행은 그대로 옮김
+        for feature in categorical_features:
+            values = sorted(set(previous.classes[feature]) | set(self.data[feature].astype(str)))
+            self.label_encoders[feature] = LabelEncoder()
+            self.label_encoders[feature].classes_ = np.array(values, dtype=object)
+            self.vocab_sizes[feature] = len(values)
+            self.data[feature] = self.label_encoders[feature].transform(self.data[feature].astype(str))
+            if feature in self.hash_buckets:
+                self.data[feature] = hash_bucket(self.original_data[feature].astype(str), self.hash_buckets[feature])
+                self.vocab_sizes[feature] = self.hash_buckets[feature] + 1
+
+        # 마지막 학습 이후 추가/변경된 행
+        hashes = self.row_hashes(self.original_data)
+        delta = ~np.isin(hashes, np.load(config.trained_rows_path))
+        if not delta.any():
+            print("추가/변경된 행 없음: 기존 모델 유지")
+            return
+
+        # 기존 가중치를 옮길 수 있도록 기존 모델과 같은 구조로 생성 (학습률 등 나머지는 현재 params)
+        self.params.update(self.architecture_params(previous_model))
+        self.create_deepfm_model()
+        embedding_index = 0
+        for layer, previous_layer in zip(self.model.layers, previous_model.layers):
+            if type(layer).__name__ == 'Embedding':
+                feature = categorical_features[embedding_index]
+                embedding_index += 1
+                if feature in self.hash_buckets:
+                    # 해싱 컬럼은 버킷 수가 같으므로 테이블 전체를 그대로 사용
+                    layer.set_weights(previous_layer.get_weights())
+                    continue
+                table = layer.get_weights()[0]
+                rows = self.label_encoders[feature].transform(np.array(previous.classes[feature], dtype=object))
+                table[rows] = previous_layer.get_weights()[0]
+                layer.set_weights([table])
+            elif layer.get_weights():
+                layer.set_weights(previous_layer.get_weights())
+
+        print(f"미세 조정 행 수: {int(delta.sum())} / {len(delta)} "
+              f"(vocab {dict((feature, len(previous.classes[feature])) for feature in categorical_features)} -> {self.vocab_sizes})")
+        delta_data = self.data[delta]
+        self.model.fit(
+            [delta_data['title'],
+            delta_data['cast'],
+            delta_data['genre'],
+            ],
+            delta_data['target'],
+            batch_size=self.params['batch_size'],
+            epochs=epochs,
+            verbose=1
+        )
+        self.save_model(config.save_model_path)
+
+    def float32_model(self):
+        """mixed_bfloat16 으로 학습한 가중치를 같은 구조의 float32 모델로 옮김
+        (저장된 모델, NumPy 엔진, 점수 테이블이 모두 같은 float32 연산으로 점수를 계산하도록)"""
+        weights, mixed = self.model.get_weights(), self.params['mixed_precision']
+        self.params['mixed_precision'] = False
+        self.create_deepfm_model()
+        self.model.set_weights(weights)
+        self.params['mixed_precision'] = mixed
+
     def save_model(self, path):
+        if self.params['mixed_precision']:
+            self.float32_model()
         self.model.save(path)
+        # 랭킹 평가는 이번 학습에서 계산한 경우에만 저장한 모델 해시와 함께 기록
+        # (이어서 학습/스트리밍/해싱 모드처럼 평가하지 않은 학습이면 이전 모델의 평가 결과를 지움)
+        if self.ranking_report is not None:
+            RankingEvaluation.save(self.ranking_report, path)
+        elif os.path.exists(config.evaluation_path):
+            os.remove(config.evaluation_path)
+        # 추론 시 같은 id 를 쓰도록 레이블 인코더도 함께 저장
+        EncoderArtifact.from_label_encoders(self.label_encoders, self.hash_buckets).save(config.label_encoder_path)
+        # TensorFlow 없이 추론할 수 있도록 NumPy 가중치 파일로도 내보냄
+        NumpyDeepFM.from_keras(self.model).save(config.numpy_model_path)
+        # 다음 warm start 에서 추가/변경된 행만 학습하도록 학습한 행 기록
+        np.save(config.trained_rows_path, self.trained_row_hashes())
 
     def run(self):
-        self.load_and_preprocess_data()
+        if self.streaming:
+            self.build_vocabulary()
+        else:
+            self.load_and_preprocess_data()
         self.train_model()
 
 # Keras 직렬화 시스템에 FMInteraction 클래스를 등록
@@ -231,12 +654,60 @@ class FMInteraction(Layer):
         super(FMInteraction, self).__init__(**kwargs)
 
     def call(self, inputs):
-        pairwise_interactions = []
-        for i in range(len(inputs)):
-            for j in range(i + 1, len(inputs)):
-                interaction = K.sum(inputs[i] * inputs[j], axis=-1, keepdims=True)
-                pairwise_interactions.append(interaction)
-        return K.sum(pairwise_interactions, axis=0)
+        # 필드 쌍별 내적의 합 = ½[(Σv)² − Σv²] : 필드 수 n 에 대해 O(n·k)
+        stacked = K.stack(inputs, axis=-2)  # (..., n, k)
+        square_of_sum = K.square(K.sum(stacked, axis=-2))
+        sum_of_square = K.sum(K.square(stacked), axis=-2)
+        return 0.5 * K.sum(square_of_sum - sum_of_square, axis=-1, keepdims=True)
+
+class ThroughputLogger(Callback):
+    """에포크별 학습 처리량 (examples/sec, 검증 시간 제외) 을 JSON 으로 출력"""
+    def __init__(self, num_examples, batch_size):
+        super(ThroughputLogger, self).__init__()
+        self.num_examples = num_examples
+        self.batch_size = batch_size
+        self.epochs = []
+
+    def on_epoch_begin(self, epoch, logs=None):
+        self.start = time.perf_counter()
+        self.batches = 0
+
+    def on_train_batch_end(self, batch, logs=None):
+        self.batches += 1
+        self.train_seconds = time.perf_counter() - self.start
+
+    def on_epoch_end(self, epoch, logs=None):
+        examples = min(self.batches * self.batch_size, self.num_examples)
+        record = {
+            'metric': 'train.throughput',
+            'epoch': epoch + 1,
+            'examples_per_sec': round(examples / self.train_seconds, 1),
+            'epoch_s': round(time.perf_counter() - self.start, 3),
+        }
+        self.epochs.append(record)
+        print(json.dumps(record))
+
+def log_event(path, record):
+    """JSON lines 로그에 한 줄 추가"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, 'a', encoding='utf-8') as file:
+        file.write(json.dumps({'time': datetime.now().isoformat(timespec='seconds'), **record}, ensure_ascii=False) + '\n')
+
+
+class JsonMetricsLogger(Callback):
+    """에포크마다 loss/지표(+처리량)를 JSON lines 로 기록 (운영 학습용, matplotlib 불필요)"""
+    def __init__(self, path, phase, throughput=None):
+        super(JsonMetricsLogger, self).__init__()
+        self.path = path
+        self.phase = phase
+        self.throughput = throughput
+
+    def on_epoch_end(self, epoch, logs=None):
+        record = {'event': 'epoch', 'phase': self.phase, 'epoch': epoch + 1}
+        record.update({key: float(value) for key, value in (logs or {}).items()})
+        if self.throughput is not None and self.throughput.epochs:
+            record['examples_per_sec'] = self.throughput.epochs[-1]['examples_per_sec']
+        log_event(self.path, record)
 
 @register_keras_serializable(package="Custom")
 def weighted_loss(y_true, y_pred):
@@ -245,5 +716,19 @@ def weighted_loss(y_true, y_pred):
 
 
 if __name__ == "__main__":
-    recommender = MusicalRecommender()
-    recommender.run()
\ No newline at end of file
+    # --streaming: 데이터 전체를 메모리에 올리지 않고 tf.data 로 학습
+    # --hash-buckets N: title/cast 를 N 개 해시 버킷(+OOV)으로 학습하여 모델 크기 고정
+    hash_buckets = {}
+    if "--hash-buckets" in sys.argv:
+        buckets = int(sys.argv[sys.argv.index("--hash-buckets") + 1])
+        hash_buckets = {'title': buckets, 'cast': buckets}
+    # --cpu-profile: CPU 전용 학습 설정 (스레드 조정, 큰 배치 + 학습률 스케일링, 가능하면 XLA / bfloat16)
+    # --headless: 운영 학습 (그래프 대신 JSON 로그, --refit 이면 최적 에포크 수만큼 전체 데이터로 이어서 재학습)
+    training_config = TrainingConfig(headless="--headless" in sys.argv, refit="--refit" in sys.argv)
+    recommender = MusicalRecommender(streaming="--streaming" in sys.argv, hash_buckets=hash_buckets,
+                                     cpu_profile="--cpu-profile" in sys.argv, training_config=training_config)
+    # --warm-start: 기존 모델에서 이어서 추가/변경된 행만 학습
+    if "--warm-start" in sys.argv:
+        recommender.warm_start()
+    else:
+        recommender.run()
\ No newline at end of file
@@ -0,0 +1,119 @@
+import json
+import hashlib
+import numpy as np
+import pandas as pd
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+
+
+def hash_bucket(values, buckets):
+    """값 -> 고정 크기 해시 버킷 id (1..buckets), 0 은 빈 값(OOV) 버킷 (프로세스 간 같은 결과)"""
+    values = pd.Series(values, dtype=object)
+    missing = values.isna() | (values.astype(str) == '')
+    hashed = pd.util.hash_array(values.astype(str).to_numpy(dtype=object)) % np.uint64(buckets) + np.uint64(1)
+    return np.where(missing, 0, hashed).astype(np.int64)
+
+
+class EncoderArtifact:
+    """학습에 사용한 레이블 인코더(classes_ 순서)와 vocab 크기를 모델 옆에 저장"""
+    format_version = 1
+    columns = ['title', 'cast', 'genre']
+
+    def __init__(self, classes, hash_buckets=None):
+        self.classes = classes  # 컬럼별 id 순서의 값 리스트 (LabelEncoder.classes_)
+        # 해싱 모드: 컬럼별 버킷 수 (모델 입력은 hash_bucket id, 임베딩 크기 = 버킷 수 + OOV 1)
+        self.hash_buckets = hash_buckets or {}
+        self.lookups = {}
+        identity = {'classes': classes, 'hash_buckets': self.hash_buckets} if self.hash_buckets else classes
+        self.version = hashlib.sha1(
+            json.dumps(identity, ensure_ascii=False, sort_keys=True).encode('utf-8')
+        ).hexdigest()[:12]
+
+    @classmethod
+    def from_label_encoders(cls, label_encoders, hash_buckets=None):
+        """학습 시 fit 된 sklearn LabelEncoder 로부터 생성"""
+        return cls({column: [str(value) for value in label_encoders[column].classes_]
+                    for column in cls.columns}, hash_buckets)
+
+    @classmethod
+    def fit(cls, data):
+        """LabelEncoder 와 동일한 정렬 순서로 데이터에서 직접 생성"""
+        return cls({column: sorted(data[column].astype(str).unique())
+                    for column in cls.columns})
+
+    @property
+    def vocab_sizes(self):
+        return {column: len(values) for column, values in self.classes.items()}
+
+    @property
+    def model_vocab_sizes(self):
+        """모델 임베딩 테이블 크기"""
+        return {column: self.hash_buckets[column] + 1 if column in self.hash_buckets else len(values)
+                for column, values in self.classes.items()}
+
+    def model_ids(self, column, values):
+        """원래 값 -> 모델 입력 id (해싱 컬럼은 처음 보는 값도 버킷으로, 아니면 없는 값은 -1)"""
+        if column in self.hash_buckets:
+            return hash_bucket(values, self.hash_buckets[column])
+        encoder = {value: idx for idx, value in enumerate(self.classes[column])}
+        return np.array([encoder.get(value, -1) for value in values], dtype=np.int64)
+
+    def model_lookup(self, column):
+        """레이블 id -> 모델 입력 id 배열 (한 번만 계산)"""
+        if column not in self.lookups:
+            self.lookups[column] = self.model_ids(column, self.classes[column])
+        return self.lookups[column]
+
+    def model_inputs(self, title, cast, genre):
+        """레이블 id 배열들 -> model.predict 입력 (해싱 모드가 아니면 그대로)"""
+        if not self.hash_buckets:
+            return [title, cast, genre]
+        return [self.model_lookup(column)[np.asarray(ids, dtype=np.int64).reshape(-1)]
+                for column, ids in zip(self.columns, [title, cast, genre])]
+
+    def label_encoders(self):
+        """값 -> id 딕셔너리 (Recommender.label_encoders 형식)"""
+        return {column: {value: idx for idx, value in enumerate(values)}
+                for column, values in self.classes.items()}
+
+    def save(self, path):
+        """임시 파일에 쓴 뒤 교체하여 읽는 쪽이 반쯤 쓰인 파일을 보지 않도록 함"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        payload = {
+            'format_version': self.format_version,
+            'version': self.version,
+            'vocab_sizes': self.vocab_sizes,
+            'hash_buckets': self.hash_buckets,
+            'classes': self.classes,
+        }
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(payload, file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                payload = json.load(file)
+        except FileNotFoundError:
+            raise FileNotFoundError("레이블 인코더 파일을 찾을 수 없음")
+        if payload.get('format_version') != cls.format_version:
+            raise ValueError(f"지원하지 않는 레이블 인코더 형식: {payload.get('format_version')}")
+        return cls(payload['classes'], payload.get('hash_buckets'))
+
+
+def export_label_encoders():
+    """기존 모델용: 학습 데이터로 레이블 인코더 파일 생성"""
+    from storage import read_table
+    data = read_table(config.df_with_negatives_path)
+    artifact = EncoderArtifact.fit(data)
+    artifact.save(config.label_encoder_path)
+    print(f"레이블 인코더 저장 완료: {artifact.vocab_sizes} -> {config.label_encoder_path}")
+    return artifact
+
+
+if __name__ == "__main__":
+    export_label_encoders()
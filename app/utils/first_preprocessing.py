@@ -5,6 +5,7 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config
+from storage import write_table
 
 
 class F_Preprocessing:
@@ -32,8 +33,8 @@ class F_Preprocessing:
         self.df = self.df.dropna()
         self.df['percentage'] = pd.to_numeric(self.df['percentage'], errors='coerce')  # 값이 문자열일 경우 처리
         self.df = self.df[self.df['percentage'] <= 100]
-        # 전처리된 데이터를 새로운 JSON 파일로 저장
-        self.df.to_json(self.processed_data, orient='records', force_ascii=False, lines=True)
+        # 전처리된 데이터 저장 (설정된 형식 + JSON lines)
+        write_table(self.df, self.processed_data)
         print(f"전처리된 데이터가 {self.processed_data}에 저장되었습니다.")
 
 
@@ -0,0 +1,56 @@
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+import numpy as np
+
+
+class StageTimer:
+    """단계별 소요 시간 수집기 (opt-in): stage 별 p50/p95 를 구조화된 JSON 으로 출력"""
+
+    def __init__(self, name="recommend", emit_every=None, max_samples=10000):
+        self.name = name
+        self.emit_every = emit_every  # 'total' 측정 N 회마다 요약 출력 (None 이면 출력 안 함)
+        self.max_samples = max_samples
+        self.samples = defaultdict(list)
+        self.lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, stage_name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(stage_name, time.perf_counter() - start)
+
+    def record(self, stage_name, seconds):
+        with self.lock:
+            samples = self.samples[stage_name]
+            samples.append(seconds)
+            if len(samples) > self.max_samples:
+                del samples[:len(samples) - self.max_samples]
+            count = len(self.samples['total'])
+        if stage_name == 'total' and self.emit_every and count % self.emit_every == 0:
+            self.emit()
+
+    def summary(self):
+        """{stage: {count, p50_ms, p95_ms, mean_ms}}"""
+        with self.lock:
+            samples = {stage: np.array(values) * 1000 for stage, values in self.samples.items()}
+        return {
+            stage: {
+                'count': len(values),
+                'p50_ms': round(float(np.percentile(values, 50)), 4),
+                'p95_ms': round(float(np.percentile(values, 95)), 4),
+                'mean_ms': round(float(values.mean()), 4),
+            }
+            for stage, values in samples.items() if len(values)
+        }
+
+    def emit(self):
+        print(json.dumps({'metric': f'{self.name}.latency', 'stages': self.summary()}, ensure_ascii=False))
+
+    def reset(self):
+        with self.lock:
+            self.samples.clear()
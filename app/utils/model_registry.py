@@ -0,0 +1,159 @@
+import hashlib
+import json
+import shutil
+from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+from storage import table_path
+from ranking_evaluation import RankingEvaluation
+
+
+def file_sha1(path):
+    digest = hashlib.sha1()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+class ModelRegistry:
+    """버전별 모델 저장소: versions/<버전>/ 에 모델 파일과 manifest.json, CURRENT 파일이 서빙 버전을 가리킴
+
+    버전 디렉토리는 임시 이름으로 모두 쓴 뒤 rename 하고, CURRENT 도 임시 파일 + os.replace 로 교체하므로
+    서빙 쪽은 항상 완성된 버전만 읽는다.
+    """
+    # 버전에 포함되는 파일: 저장소 안 이름 -> 학습 파이프라인이 만드는 경로
+    artifacts = {
+        'Recommend.h5': config.save_model_path,
+        'Recommend.npz': config.numpy_model_path,
+        'label_encoders.json': config.label_encoder_path,
+        'score_table/triples.npy': os.path.join(config.score_table_path, "triples.npy"),
+        'score_table/scores.npy': os.path.join(config.score_table_path, "scores.npy"),
+        'score_table/ids.json': os.path.join(config.score_table_path, "ids.json"),
+    }
+
+    def __init__(self, root=config.model_registry_path):
+        self.root = root
+
+    @property
+    def pointer_path(self):
+        return os.path.join(self.root, "CURRENT")
+
+    def version_path(self, version):
+        return os.path.join(self.root, "versions", version)
+
+    def path(self, name, version=None):
+        """버전(기본: 현재 버전) 안의 파일 경로"""
+        return os.path.join(self.version_path(version or self.current_version()), name)
+
+    def recommender_paths(self, version=None):
+        """Recommender(paths=...) 에 넘길 버전 디렉토리 안의 경로"""
+        version = version or self.current_version()
+        return {
+            'model': self.path('Recommend.h5', version),
+            'numpy_model': self.path('Recommend.npz', version),
+            'label_encoders': self.path('label_encoders.json', version),
+            'score_table': self.path('score_table', version),
+        }
+
+    def current_version(self):
+        """현재 서빙 버전 (없으면 None)"""
+        try:
+            with open(self.pointer_path, 'r', encoding='utf-8') as file:
+                return file.read().strip() or None
+        except FileNotFoundError:
+            return None
+
+    def versions(self):
+        """완성된 버전 목록 (오래된 순)"""
+        versions_dir = os.path.join(self.root, "versions")
+        if not os.path.exists(versions_dir):
+            return []
+        return sorted(name for name in os.listdir(versions_dir) if not name.endswith('.tmp'))
+
+    def manifest(self, version=None):
+        try:
+            with open(self.path("manifest.json", version), 'r', encoding='utf-8') as file:
+                return json.load(file)
+        except (FileNotFoundError, TypeError):
+            raise FileNotFoundError("모델 저장소 manifest 를 찾을 수 없음")
+
+    def is_current(self, sources=None):
+        """학습 파이프라인 결과 파일이 현재 버전과 같은지 (같으면 다시 등록할 필요 없음)"""
+        sources = sources or self.artifacts
+        if self.current_version() is None:
+            return False
+        files = self.manifest()['files']
+        return all(name in files and os.path.exists(path) and files[name] == file_sha1(path)
+                   for name, path in sources.items())
+
+    def publish(self, sources=None, metrics=None, activate=True):
+        """파일들을 새 버전 디렉토리로 복사하고 manifest 작성 후 CURRENT 를 새 버전으로 교체"""
+        sources = sources or self.artifacts
+        missing = [path for path in sources.values() if not os.path.exists(path)]
+        if missing:
+            raise FileNotFoundError(f"등록할 모델 파일을 찾을 수 없음: {missing}")
+
+        files = {name: file_sha1(path) for name, path in sources.items()}
+        content_hash = hashlib.sha1(json.dumps(files, sort_keys=True).encode('utf-8')).hexdigest()[:8]
+        version = f"{datetime.now().strftime('%Y%m%d-%H%M%S')}-{content_hash}"
+
+        tmp_path = f"{self.version_path(version)}.tmp"
+        shutil.rmtree(tmp_path, ignore_errors=True)
+        for name, path in sources.items():
+            os.makedirs(os.path.dirname(os.path.join(tmp_path, name)), exist_ok=True)
+            shutil.copy2(path, os.path.join(tmp_path, name))
+
+        with open(os.path.join(tmp_path, 'label_encoders.json'), 'r', encoding='utf-8') as file:
+            encoder_version = json.load(file).get('version')
+        data_path = table_path(config.df_with_negatives_path)
+        manifest = {
+            'version': version,
+            'created_at': datetime.now().isoformat(timespec='seconds'),
+            'data_hash': file_sha1(data_path) if data_path else None,
+            'encoder_version': encoder_version,
+            'metrics': metrics,
+            'files': files,
+        }
+        with open(os.path.join(tmp_path, "manifest.json"), 'w', encoding='utf-8') as file:
+            json.dump(manifest, file, ensure_ascii=False, indent=2)
+        os.rename(tmp_path, self.version_path(version))
+
+        if activate:
+            self.activate(version)
+        return version
+
+    def activate(self, version):
+        """CURRENT 를 원자적으로 교체 (롤백에도 사용)"""
+        if not os.path.exists(os.path.join(self.version_path(version), "manifest.json")):
+            raise FileNotFoundError(f"등록되지 않은 모델 버전: {version}")
+        tmp_path = f"{self.pointer_path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(version)
+        os.replace(tmp_path, self.pointer_path)
+
+    def prune(self, keep=3):
+        """현재 버전과 최근 keep 개(방금 교체되어 아직 읽는 프로세스가 있을 수 있는 이전 버전 포함)를 제외하고 삭제"""
+        current = self.current_version()
+        for version in self.versions()[:-keep]:
+            if version != current:
+                shutil.rmtree(self.version_path(version), ignore_errors=True)
+
+
+def publish_if_changed():
+    """파이프라인 마지막 단계: 학습 결과가 현재 버전과 다르면 새 버전으로 등록하고 현재 버전 반환"""
+    registry = ModelRegistry()
+    if registry.is_current():
+        print(f"모델 저장소 변경 없음 (현재 버전 {registry.current_version()})")
+    else:
+        # 현재 모델 파일을 평가한 결과만 포함 (다른 모델의 평가가 남아 있으면 metrics 없음)
+        version = registry.publish(metrics=RankingEvaluation.load(config.save_model_path))
+        registry.prune()
+        print(f"모델 버전 등록 완료: {version} -> {registry.root}")
+    return registry.current_version()
+
+
+if __name__ == "__main__":
+    publish_if_changed()
@@ -0,0 +1,118 @@
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+
+
+class NumpyDeepFM:
+    """Recommend.h5 의 가중치만으로 동작하는 NumPy 추론 엔진 (TensorFlow 불필요)"""
+    features = ['title', 'cast', 'genre']
+    activations = {
+        'relu': lambda x: np.maximum(x, 0),
+        'sigmoid': lambda x: 0.5 * (1 + np.tanh(0.5 * x)),
+        'linear': lambda x: x,
+    }
+
+    def __init__(self, embeddings, kernels, biases, activations):
+        self.embeddings = embeddings  # 피처 순서(title, cast, genre)의 임베딩 테이블
+        self.kernels = kernels        # Dense 레이어 가중치 (Dropout 은 추론 시 항등)
+        self.biases = biases
+        self.activation_names = activations
+
+    @classmethod
+    def from_keras(cls, model):
+        """학습된 Keras DeepFM 모델에서 가중치 추출"""
+        embeddings, kernels, biases, activations = [], [], [], []
+        for layer in model.layers:
+            layer_type = type(layer).__name__
+            if layer_type == 'Embedding':
+                embeddings.append(layer.get_weights()[0].astype(np.float32))
+            elif layer_type == 'Dense':
+                kernel, bias = layer.get_weights()
+                kernels.append(kernel.astype(np.float32))
+                biases.append(bias.astype(np.float32))
+                activations.append(layer.activation.__name__)
+        if len(embeddings) != len(cls.features):
+            raise ValueError(f"임베딩 레이어 수가 맞지 않음: {len(embeddings)}")
+        return cls(embeddings, kernels, biases, activations)
+
+    def save(self, path):
+        """하나의 .npz 파일로 저장"""
+        arrays = {f'embedding_{feature}': table for feature, table in zip(self.features, self.embeddings)}
+        for i, (kernel, bias) in enumerate(zip(self.kernels, self.biases)):
+            arrays[f'dense_{i}_kernel'] = kernel
+            arrays[f'dense_{i}_bias'] = bias
+        arrays['activations'] = np.array(self.activation_names)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp_path = f"{path}.tmp.npz"
+        np.savez(tmp_path, **arrays)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path):
+        try:
+            with np.load(path) as arrays:
+                embeddings = [arrays[f'embedding_{feature}'] for feature in cls.features]
+                activations = [str(name) for name in arrays['activations']]
+                kernels = [arrays[f'dense_{i}_kernel'] for i in range(len(activations))]
+                biases = [arrays[f'dense_{i}_bias'] for i in range(len(activations))]
+        except FileNotFoundError:
+            raise FileNotFoundError("NumPy 모델 파일을 찾을 수 없음")
+        return cls(embeddings, kernels, biases, activations)
+
+    @property
+    def vocab_sizes(self):
+        return {feature: len(table) for feature, table in zip(self.features, self.embeddings)}
+
+    def forward(self, title, cast, genre):
+        """(N,) 정수 id 배열 -> (N,) 예측 점수"""
+        vectors = [table[np.asarray(ids, dtype=np.int64).reshape(-1)]
+                   for table, ids in zip(self.embeddings, [title, cast, genre])]
+        # FM 2차 상호작용: 필드 쌍별 내적의 합 = ½[(Σv)² − Σv²]
+        stacked = np.stack(vectors, axis=1)
+        fm = 0.5 * np.sum(np.square(stacked.sum(axis=1)) - np.square(stacked).sum(axis=1), axis=-1, keepdims=True)
+        x = np.concatenate(vectors + [fm], axis=1)
+        for kernel, bias, activation in zip(self.kernels, self.biases, self.activation_names):
+            x = self.activations[activation](x @ kernel + bias)
+        return x.reshape(-1)
+
+    def predict(self, inputs, batch_size=65536, verbose=0):
+        """Keras model.predict([title, cast, genre]) 와 같은 형태((N, 1))로 반환"""
+        title, cast, genre = [np.asarray(values).reshape(-1) for values in inputs]
+        outputs = [self.forward(title[start:start + batch_size],
+                                cast[start:start + batch_size],
+                                genre[start:start + batch_size])
+                   for start in range(0, len(title), batch_size)]
+        if not outputs:
+            return np.zeros((0, 1), dtype=np.float32)
+        return np.concatenate(outputs).reshape(-1, 1)
+
+
+def export_numpy_model():
+    """Recommend.h5 -> Recommend.npz 변환 및 model.predict 와의 오차 확인 (허용 오차 초과 시 ValueError)"""
+    from tensorflow.keras.models import load_model
+    from DeepFM import weighted_loss, FMInteraction
+
+    model = load_model(config.save_model_path, custom_objects={
+        "weighted_loss": weighted_loss,
+        "FMInteraction": FMInteraction
+    })
+    engine = NumpyDeepFM.from_keras(model)
+    engine.save(config.numpy_model_path)
+
+    rng = np.random.default_rng(42)
+    sizes = engine.vocab_sizes
+    sample = [rng.integers(0, sizes[feature], 10000) for feature in NumpyDeepFM.features]
+    expected = model.predict(sample, batch_size=4096, verbose=0).reshape(-1)
+    actual = engine.predict(sample).reshape(-1)
+    max_error = np.abs(expected - actual).max()
+    print(f"NumPy 모델 저장 완료: {config.numpy_model_path}")
+    print(f"model.predict 대비 최대 오차: {max_error:.2e}")
+    if max_error > 1e-4:
+        raise ValueError("NumPy 모델 결과가 Keras 모델과 허용 오차 이상 다름")
+    return max_error
+
+
+if __name__ == "__main__":
+    export_numpy_model()
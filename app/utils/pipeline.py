@@ -0,0 +1,264 @@
+"""
+학습 파이프라인 실행기: 단계별 입력/출력 선언 + 내용 해시 기반 증분 실행
+
+- 각 단계는 한 프로세스 안에서 함수로 실행 (pandas/TensorFlow 는 처음 한 번만 import)
+- 지문(fingerprint) = 입력 파일 내용 해시 + 단계 코드 파일 내용 해시. 마지막 성공 실행과 같고 출력이 모두 있으면 건너뜀
+- 실행 기록이 없으면(처음 도입 시) 출력이 입력보다 최신인 단계는 다시 실행하지 않고 현재 상태를 기록만 함
+- 선행 단계가 끝난 단계들은 스레드 풀에서 동시에 실행
+실행 기록: config.pipeline_state_path (단계별 지문/입력 해시/소요 시간, 파일 해시 캐시)
+  경로 키는 config.BASE_DIR 기준 상대 경로라 저장소를 다른 위치로 옮겨도 기록이 그대로 유효
+진행 상황: progress(name, state) 콜백 (state: running / run / pass / adopt / failed / blocked)
+"""
+import hashlib
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, FIRST_COMPLETED, wait
+from datetime import datetime
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+from storage import table_path, pipeline_tables
+
+utils_dir = os.path.dirname(os.path.abspath(__file__))
+
+
+class Stage:
+    """파이프라인 단계: inputs -> action(changed) -> outputs
+
+    inputs/outputs: 파일 또는 디렉토리 경로. 중간 데이터(storage.pipeline_tables)는 실제로 읽는 parquet/feather/JSON 파일로 해석.
+    outputs 항목은 경로를 돌려주는 함수일 수도 있음 (예: 모델 버전별 추천 캐시 파일)
+    code: 단계 코드 파일 (utils 기준 상대 경로), 내용이 바뀌면 다시 실행
+    action(changed): 마지막 실행 이후 바뀐 입력 키 목록을 받음 (입력 경로, 코드는 'code:<파일>', 출력만 없어졌으면 빈 목록,
+    이전 실행 기록이 없으면 None)
+    """
+
+    def __init__(self, name, action, inputs=(), outputs=(), code=()):
+        self.name = name
+        self.action = action
+        self.inputs = list(inputs)
+        self.outputs = list(outputs)
+        self.code = list(code)
+
+
+class Pipeline:
+    def __init__(self, stages, state_path=config.pipeline_state_path, workers=2, progress=None):
+        self.stages = {stage.name: stage for stage in stages}
+        self.state_path = state_path
+        self.workers = workers
+        self.progress = progress
+        self.lock = threading.Lock()
+        self.state = self.load_state()
+        self.migrate_state()
+        # 출력 경로 -> 만드는 단계 (입력이 다른 단계의 출력이면 그 단계가 선행 단계)
+        producers = {output: stage.name for stage in stages for output in stage.outputs if not callable(output)}
+        self.dependencies = {stage.name: {producers[path] for path in stage.inputs if path in producers}
+                             for stage in stages}
+
+    def load_state(self):
+        try:
+            with open(self.state_path, 'r', encoding='utf-8') as file:
+                state = json.load(file)
+        except FileNotFoundError:
+            state = {}
+        state.setdefault('stages', {})
+        state.setdefault('hashes', {})
+        return state
+
+    def migrate_state(self):
+        """이전 형식(절대 경로 키) 실행 기록 -> BASE_DIR 기준 상대 경로 키
+        (다른 위치에서 만든 기록이어도 경로 끝부분이 단계 입력의 상대 경로와 같으면 그 입력으로 대응, 지문도 다시 계산)"""
+        for name, record in self.state['stages'].items():
+            if name not in self.stages or not any(os.path.isabs(key) for key in record['inputs']):
+                continue
+            keys = [self.path_key(path) for path in self.stages[name].inputs]
+            inputs = {}
+            for key, value in record['inputs'].items():
+                if os.path.isabs(key):
+                    key = next((relative for relative in keys if key.replace(os.sep, '/').endswith(f"/{relative}")), key)
+                inputs[key] = value
+            record['inputs'], record['fingerprint'] = inputs, self.fingerprint(inputs)
+        # 파일 해시 캐시는 크기/수정 시각이 같을 때만 쓰므로 이전 키는 버려도 다시 계산될 뿐
+        self.state['hashes'] = {key: value for key, value in self.state['hashes'].items() if not os.path.isabs(key)}
+
+    @staticmethod
+    def path_key(path):
+        """실행 기록의 경로 키: config.BASE_DIR 기준 상대 경로 ('/' 구분)"""
+        return os.path.relpath(path, config.BASE_DIR).replace(os.sep, '/')
+
+    def save_state(self):
+        os.makedirs(os.path.dirname(self.state_path), exist_ok=True)
+        tmp_path = f"{self.state_path}.{os.getpid()}.tmp"
+        with self.lock:
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.state, file, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.state_path)
+
+    @staticmethod
+    def resolve(path):
+        """선언된 경로 -> 실제 파일 경로"""
+        path = path() if callable(path) else path
+        if path in pipeline_tables:
+            return table_path(path) or path
+        return path
+
+    def file_hash(self, path):
+        """파일/디렉토리 내용 sha1 (없으면 None). 크기와 수정 시각이 같으면 캐시된 해시 사용"""
+        if os.path.isdir(path):
+            digest = hashlib.sha1()
+            for root, _, files in sorted(os.walk(path)):
+                for name in sorted(files):
+                    file_path = os.path.join(root, name)
+                    digest.update(os.path.relpath(file_path, path).encode('utf-8'))
+                    digest.update((self.file_hash(file_path) or '').encode('utf-8'))
+            return digest.hexdigest()
+        if not os.path.exists(path):
+            return None
+        stat = os.stat(path)
+        key = self.path_key(path)
+        with self.lock:
+            cached = self.state['hashes'].get(key)
+        if cached and cached[0] == stat.st_size and cached[1] == stat.st_mtime_ns:
+            return cached[2]
+        digest = hashlib.sha1()
+        with open(path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        with self.lock:
+            self.state['hashes'][key] = [stat.st_size, stat.st_mtime_ns, digest.hexdigest()]
+        return digest.hexdigest()
+
+    def input_hashes(self, stage):
+        """입력 키 -> 내용 해시 (입력 경로는 선언된 이름의 BASE_DIR 기준 상대 경로를 키로, 코드는 'code:<파일>')"""
+        hashes = {self.path_key(path): self.file_hash(self.resolve(path)) for path in stage.inputs}
+        hashes.update({f"code:{name}": self.file_hash(os.path.join(utils_dir, name)) for name in stage.code})
+        return hashes
+
+    @staticmethod
+    def fingerprint(hashes):
+        return hashlib.sha1(json.dumps(hashes, sort_keys=True).encode('utf-8')).hexdigest()
+
+    def decide(self, stage):
+        """단계 실행 여부: ('run', 바뀐 입력 또는 None(이전 실행 기록 없음)) / ('pass', 이유) / ('adopt', 이유)"""
+        hashes = self.input_hashes(stage)
+        outputs = [self.resolve(path) for path in stage.outputs]
+        missing_outputs = [path for path in outputs if not os.path.exists(path)]
+        missing_inputs = [key for key, value in hashes.items() if value is None]
+        if missing_inputs:
+            if not missing_outputs:
+                return 'pass', hashes, f"입력 없음, 기존 출력 사용 ({', '.join(os.path.basename(key) for key in missing_inputs)})"
+            raise FileNotFoundError(f"{stage.name} 단계 입력 파일을 찾을 수 없음: {missing_inputs}")
+
+        record = self.state['stages'].get(stage.name)
+        if record is None:
+            # 처음 도입: 출력이 모두 있고 입력보다 최신이면 기존 결과를 그대로 인정
+            input_paths = [self.resolve(path) for path in stage.inputs]
+            if not missing_outputs and (not input_paths or max(map(os.path.getmtime, input_paths))
+                                        <= min(map(os.path.getmtime, outputs))):
+                return 'adopt', hashes, "기존 출력이 입력보다 최신"
+            # 무엇이 바뀌었는지 알 수 없음 (단계가 처음 실행으로 처리)
+            return 'run', hashes, None
+        if missing_outputs:
+            return 'run', hashes, []
+        if record['fingerprint'] == self.fingerprint(hashes):
+            return 'pass', hashes, "입력/코드 변경 없음"
+        # action 에는 선언된 입력 경로로 전달 (예: config.df_with_negatives_path in changed)
+        names = {self.path_key(path): path for path in stage.inputs}
+        return 'run', hashes, sorted(names.get(key, key) for key in hashes if record['inputs'].get(key) != hashes[key])
+
+    def record(self, stage, hashes, seconds=None):
+        with self.lock:
+            self.state['stages'][stage.name] = {
+                'fingerprint': self.fingerprint(hashes),
+                'inputs': hashes,
+                'finished_at': datetime.now().isoformat(timespec='seconds'),
+                'seconds': seconds,
+            }
+        self.save_state()
+
+    def report(self, name, state):
+        if self.progress is not None:
+            self.progress(name, state)
+
+    def run_stage(self, name):
+        stage = self.stages[name]
+        decision, hashes, detail = self.decide(stage)
+        if decision == 'pass':
+            print(f"pass {name} ({detail})")
+            self.report(name, 'pass')
+            return 'pass'
+        if decision == 'adopt':
+            print(f"pass {name} ({detail}, 실행 기록 생성)")
+            self.record(stage, hashes)
+            self.report(name, 'adopt')
+            return 'adopt'
+        if detail is None:
+            print(f"run {name} (이전 실행 기록 없음)")
+        else:
+            print(f"run {name} (변경: {', '.join(os.path.basename(key) for key in detail) or '출력 없음'})")
+        self.report(name, 'running')
+        start = time.perf_counter()
+        stage.action(detail)
+        seconds = round(time.perf_counter() - start, 2)
+        self.record(stage, hashes, seconds)
+        print(f"done {name} ({seconds}s)")
+        self.report(name, 'run')
+        return 'run'
+
+    def order(self):
+        """선행 단계 순서 (선언 순서 유지)"""
+        ordered, done = [], set()
+        while len(ordered) < len(self.stages):
+            ready = [name for name in self.stages if name not in done and self.dependencies[name] <= done]
+            if not ready:
+                raise ValueError(f"파이프라인 단계 의존성에 순환이 있음: {set(self.stages) - done}")
+            ordered += ready
+            done.update(ready)
+        return ordered
+
+    def plan(self):
+        """실행하지 않고 단계별 예상 결과 (선행 단계가 실행되면 후속 단계도 실행 예정으로 표시)"""
+        plan = {}
+        for name in self.order():
+            if any(plan[dependency] == 'run' for dependency in self.dependencies[name]):
+                plan[name] = 'run'
+                continue
+            try:
+                plan[name] = self.decide(self.stages[name])[0]
+            except FileNotFoundError:
+                plan[name] = 'missing'
+        return plan
+
+    def run(self):
+        """선행 단계가 끝난 단계부터 동시에 실행. 실패한 단계의 후속 단계는 실행하지 않음 (끝난 뒤 RuntimeError)"""
+        self.order()  # 순환 확인
+        results, errors = {}, {}
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            running = {}
+            while len(results) < len(self.stages):
+                for name in self.stages:
+                    if name in results or name in running.values():
+                        continue
+                    dependencies = self.dependencies[name]
+                    if any(results.get(dependency) in ('failed', 'blocked') for dependency in dependencies):
+                        results[name] = 'blocked'
+                        print(f"skip {name} (선행 단계 실패)")
+                        self.report(name, 'blocked')
+                    elif all(dependency in results for dependency in dependencies):
+                        running[executor.submit(self.run_stage, name)] = name
+                if not running:
+                    continue
+                finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in finished:
+                    name = running.pop(future)
+                    try:
+                        results[name] = future.result()
+                    except Exception as e:
+                        print(f"Error occurred in stage {name}: {e}")
+                        results[name] = 'failed'
+                        errors[name] = e
+                        self.report(name, 'failed')
+        if errors:
+            raise RuntimeError(f"파이프라인 단계 실패: {', '.join(errors)}") from next(iter(errors.values()))
+        return results
@@ -0,0 +1,174 @@
+"""
+백그라운드 파이프라인 작업: 학습 파이프라인(All_Musical_Process)을 웹 요청과 분리된 별도 프로세스에서 실행
+
+- start_pipeline(): 작업 프로세스를 띄우고 바로 반환 (이미 실행 중이면 띄우지 않음)
+- start_if_idle(): 작업이 끝난 지 restart_interval 초가 지났으면 다시 시작 (페이지가 열릴 때마다 호출, 나중에 들어온 데이터 반영)
+- 작업 프로세스는 잠금 파일(filelock)을 잡은 동안만 실행하고, 단계별 진행 상황을 상태 파일(config.pipeline_status_path)에 기록
+- 페이지는 read_status() 로 상태 파일만 읽음. 새 모델은 마지막 단계(model_registry)에서 CURRENT 가 교체될 때
+  RecommenderService 가 다시 로드하므로, 작업 중에도 이전 모델로 추천
+상태: idle -> starting (start_pipeline 이 기록) -> running -> done / failed
+작업 프로세스가 비정상 종료되면 잠금이 풀리므로 상태가 running 으로 남아 있어도 failed 로 읽음
+
+실행: python pipeline_worker.py [--workers N]  -> 작업을 현재 프로세스에서 실행
+      python pipeline_worker.py --start       -> 백그라운드로 시작 (로그: config.pipeline_worker_log_path)
+      python pipeline_worker.py --status      -> 상태 출력
+"""
+import json
+import subprocess
+import threading
+from datetime import datetime
+from filelock import FileLock, Timeout
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+
+utils_dir = os.path.dirname(os.path.abspath(__file__))
+lock_path = f"{config.pipeline_status_path}.lock"
+start_timeout = 60  # starting 상태에서 작업 프로세스가 잠금을 잡을 때까지 기다리는 시간 (초)
+restart_interval = 300  # 마지막 작업이 끝난 뒤 새 입력을 확인하러 다시 시작하기까지의 최소 간격 (초)
+
+
+def now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+class PipelineStatus:
+    """상태 파일 기록 (임시 파일에 쓴 뒤 교체하므로 페이지는 항상 완성된 파일을 읽음)"""
+
+    def __init__(self, stages, path=config.pipeline_status_path, state='running', pid=None):
+        self.path = path
+        self.lock = threading.Lock()
+        self.status = {
+            'state': state,
+            'pid': pid,
+            'started_at': now(),
+            'updated_at': now(),
+            'finished_at': None,
+            'error': None,
+            'model_version': None,
+            'stages': {name: 'pending' for name in stages},
+        }
+        self.write()
+
+    def write(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.{os.getpid()}.tmp"
+        with self.lock:
+            self.status['updated_at'] = now()
+            with open(tmp_path, 'w', encoding='utf-8') as file:
+                json.dump(self.status, file, ensure_ascii=False, indent=2)
+            os.replace(tmp_path, self.path)
+
+    def update(self, name, state):
+        """Pipeline progress 콜백 (단계 스레드에서 호출)"""
+        with self.lock:
+            self.status['stages'][name] = state
+        self.write()
+
+    def finish(self, error=None):
+        from model_registry import ModelRegistry
+        with self.lock:
+            self.status['state'] = 'failed' if error else 'done'
+            self.status['error'] = str(error) if error else None
+            self.status['finished_at'] = now()
+            self.status['model_version'] = ModelRegistry().current_version()
+        self.write()
+
+
+def is_running():
+    """작업 프로세스가 잠금을 잡고 있는지"""
+    lock = FileLock(lock_path)
+    try:
+        lock.acquire(timeout=0)
+    except Timeout:
+        return True
+    lock.release()
+    return False
+
+
+def read_status():
+    """상태 파일 읽기 (작업을 한 번도 실행하지 않았으면 idle)"""
+    try:
+        with open(config.pipeline_status_path, 'r', encoding='utf-8') as file:
+            status = json.load(file)
+    except FileNotFoundError:
+        return {'state': 'idle', 'stages': {}}
+    if status['state'] in ('starting', 'running') and not is_running():
+        # starting: 작업 프로세스가 아직 잠금을 잡기 전일 수 있으므로 start_timeout 동안은 그대로 둠
+        waited = (datetime.now() - datetime.fromisoformat(status['started_at'])).total_seconds()
+        if status['state'] == 'running' or waited > start_timeout:
+            status['state'] = 'failed'
+            status['error'] = "작업 프로세스가 중간에 종료됨"
+    return status
+
+
+def status_progress(status):
+    """(끝난 단계 수, 전체 단계 수)"""
+    stages = status.get('stages', {})
+    return sum(state not in ('pending', 'running') for state in stages.values()), len(stages)
+
+
+def start_pipeline(workers=2):
+    """작업 프로세스를 백그라운드로 시작하고 바로 반환 (시작했으면 Popen, 이미 실행 중이면 None)
+    여러 세션이 동시에 호출해도 잠금을 먼저 잡은 프로세스 하나만 실행하고 나머지는 바로 종료"""
+    if is_running():
+        return None
+    # 작업 프로세스가 모듈을 불러오는 동안에도 페이지가 이전 결과(done) 대신 진행 중으로 보도록 먼저 기록
+    PipelineStatus([], state='starting')
+    os.makedirs(os.path.dirname(config.pipeline_worker_log_path), exist_ok=True)
+    with open(config.pipeline_worker_log_path, 'a', encoding='utf-8') as log:
+        return subprocess.Popen(
+            [sys.executable, '-u', os.path.abspath(__file__), '--workers', str(workers)],
+            cwd=utils_dir, stdin=subprocess.DEVNULL, stdout=log, stderr=subprocess.STDOUT,
+            env={**os.environ, 'PYTHONIOENCODING': 'utf-8'},
+            start_new_session=True,  # 웹 서버 프로세스의 시그널(재시작 등)과 분리
+        )
+
+
+def start_if_idle(workers=2, interval=restart_interval):
+    """실행 중인 작업이 없고 마지막 작업이 끝난 지 interval 초가 지났으면 다시 시작 (시작했으면 Popen, 아니면 None)
+    입력 지문이 마지막 실행과 같은 단계는 건너뛰므로, 그 사이 새로 들어온 데이터가 있을 때만 실제로 학습함"""
+    status = read_status()
+    if status['state'] in ('starting', 'running'):
+        return None
+    finished_at = status.get('finished_at')
+    if finished_at and (datetime.now() - datetime.fromisoformat(finished_at)).total_seconds() < interval:
+        return None
+    return start_pipeline(workers)
+
+
+def run_worker(workers=2):
+    """잠금을 잡은 뒤 파이프라인 실행 (이미 다른 작업이 실행 중이면 None)"""
+    lock = FileLock(lock_path)
+    try:
+        lock.acquire(timeout=0)
+    except Timeout:
+        print("파이프라인 작업이 이미 실행 중")
+        return None
+    try:
+        from All_Musical_Process import Musical_Process, musical_stages
+        status = PipelineStatus([stage.name for stage in musical_stages()], pid=os.getpid())
+        print(f"[{now()}] 파이프라인 작업 시작 (pid {os.getpid()})")
+        try:
+            results = Musical_Process(workers=workers, progress=status.update).run()
+        except Exception as e:
+            status.finish(e)
+            print(f"[{now()}] 파이프라인 작업 실패: {e}")
+            raise
+        status.finish()
+        print(f"[{now()}] 파이프라인 작업 완료 (model {status.status['model_version']})")
+        return results
+    finally:
+        lock.release()
+
+
+if __name__ == "__main__":
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 2
+    if "--status" in sys.argv:
+        print(json.dumps(read_status(), ensure_ascii=False, indent=2))
+    elif "--start" in sys.argv:
+        process = start_pipeline(workers)
+        print(f"파이프라인 작업 시작 (pid {process.pid})" if process else "파이프라인 작업이 이미 실행 중")
+    else:
+        run_worker(workers)
@@ -1,4 +1,9 @@
-import json
+import itertools
+import multiprocessing
+import shutil
+import zlib
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import shared_memory
 import pandas as pd
 import numpy as np
 import re
@@ -6,23 +11,91 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config
+from storage import read_table, write_table, append_tables, storage_format
+
+# 병렬 부정 샘플링 워커가 공유 메모리에서 읽는 영화 목록 (init_sampling_worker 에서 설정)
+worker_state = {}
+movie_arrays = ['title_codes', 'genre_codes', 'percentage', 'ticket_price']
+
+
+def available_cpus():
+    """이 프로세스가 쓸 수 있는 CPU 수 (컨테이너/affinity 제한 반영)"""
+    if hasattr(os, 'sched_getaffinity'):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def actor_rng(seed, cast):
+    """배우별 난수 생성기: 전역 시드 + 배우 이름 해시 (워커 수, 샤드 구성과 무관하게 같은 결과)"""
+    return np.random.default_rng([seed, zlib.crc32(str(cast).encode('utf-8'))])
+
+
+def sample_actor(cast, n, played_titles, played_genres, title_codes, genre_codes, num_titles, num_genres, seed):
+    """배우 한 명의 부정 샘플 영화 행 번호 (출연 title/genre 코드 제외, 후보가 n 개보다 적으면 중복 허용)"""
+    title_mask = np.zeros(num_titles + 1, dtype=bool)  # 영화 목록에 없는 값(-1)은 마지막 여분 칸
+    genre_mask = np.zeros(num_genres + 1, dtype=bool)
+    title_mask[played_titles] = True
+    genre_mask[played_genres] = True
+    movies = np.flatnonzero(~title_mask[title_codes] & ~genre_mask[genre_codes])
+    if n == 0 or len(movies) == 0:
+        return np.empty(0, dtype=np.int64)
+    rng = actor_rng(seed, cast)
+    if len(movies) >= n:
+        return rng.choice(movies, size=n, replace=False)
+    # 후보가 부족한 배우는 기존 방식처럼 중복을 허용해 1:ratio 유지 (후보 전체 + 나머지 복원 추출)
+    return np.concatenate([rng.permutation(movies), rng.choice(movies, size=n - len(movies))])
+
+
+def negative_frame(casts, movie_rows, titles, genres, arrays):
+    """(배우, 영화 행 번호) -> 부정 샘플 DataFrame (영화 정보는 코드/배열에서 조회)"""
+    return pd.DataFrame({
+        'cast': casts,
+        'title': np.asarray(titles, dtype=object)[arrays['title_codes'][movie_rows]],
+        'genre': np.asarray(genres, dtype=object)[arrays['genre_codes'][movie_rows]],
+        'percentage': arrays['percentage'][movie_rows],
+        'ticket_price': arrays['ticket_price'][movie_rows],
+        'target': 0,
+    })
+
+
+def init_sampling_worker(specs, titles, genres, seed):
+    """워커 시작 시 공유 메모리의 영화 배열에 연결 (복사 없이 읽기)"""
+    worker_state['blocks'] = []
+    for name, (block_name, shape, dtype) in specs.items():
+        block = shared_memory.SharedMemory(name=block_name)
+        worker_state['blocks'].append(block)  # 배열이 참조하는 동안 닫히지 않도록 보관
+        worker_state[name] = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+    worker_state.update(titles=titles, genres=genres, seed=seed)
+
+
+def sample_shard(shard_path, actors):
+    """배우 묶음 하나의 부정 샘플을 parquet 샤드 파일로만 저장하고 경로 반환 (JSON 등 최종 형식은 이어 붙일 때 한 번만 기록)"""
+    state = worker_state
+    casts, movie_rows = [], []
+    for cast, n, played_titles, played_genres in actors:
+        rows = sample_actor(cast, n, played_titles, played_genres, state['title_codes'], state['genre_codes'],
+                            len(state['titles']), len(state['genres']), state['seed'])
+        casts.extend([cast] * len(rows))
+        movie_rows.append(rows)
+    negative_df = negative_frame(casts, np.concatenate(movie_rows).astype(np.int64),
+                                 state['titles'], state['genres'], state)
+    write_table(negative_df, shard_path, storage='parquet', export_json=False)
+    return shard_path
+
 
 class Preprocessing:
-    def __init__(self):
+    def __init__(self, workers=1, seed=42, shard_size=64, parallel_min_rows=100000):
         self.data_list = []
         self.df = None
+        self.workers = workers        # 2 이상이면 배우 묶음을 프로세스 풀에서 병렬로 샘플링하여 샤드 파일로 저장
+        self.seed = seed              # 배우별 시드 = (seed, 배우 이름 해시)
+        self.shard_size = shard_size  # 샤드 하나의 배우 수 (결과는 워커 수와 무관)
+        # 긍정 행 수가 이보다 적으면 프로세스 시작/샤드 파일 비용이 더 커서 순차 샘플링
+        self.parallel_min_rows = parallel_min_rows
 
     def load_data(self):
-        data_list = []
-        # JSON 파일 한 줄씩 읽어서 처리
-        with open(f'{config.file_path}/{config.add_genre_file_name}', 'r', encoding='utf-8-sig') as file:
-            for line in file:
-                # 한 줄의 JSON 문자열을 딕셔너리로 변환
-                data = json.loads(line.strip())
-                data_list.append(data)  # 리스트에 추가
-
-        # 리스트를 DataFrame으로 변환
-        self.df = pd.DataFrame(data_list)
+        # 장르 추가 데이터 로드 (parquet/feather 가 있으면 그 파일, 없으면 JSON lines)
+        self.df = read_table(f'{config.file_path}/{config.add_genre_file_name}')
     
     def extract_ticket_price(self, ticket_price):
         """ticket_price 컬럼 처리 로직"""
@@ -61,7 +134,8 @@ class Preprocessing:
         return normalized.round(4)
 
 
-    def preprocessing_data(self):
+    def positive_data(self):
+        """긍정 샘플(배우별 행 확장, 5개 이상 출연 배우)과 부정 샘플 후보 영화 목록"""
 
         # 장르 처리: '중' 키워드 포함 시 마지막 장르 선택
         def extract_final_genre(genre):
@@ -119,8 +193,8 @@ class Preprocessing:
         positive_df['ticket_price'] = df_selected.loc[
             df_selected['target'] == 1, 'normalized_ticket_price'
         ].round(4)
-        # 중간 컬럼 제거
-        df_selected = df_selected.drop(columns=['normalized_ticket_price', 'processed_ticket_price'])
+        # 중간 컬럼 제거 (정규화된 가격은 부정 샘플의 영화별 가격으로 사용)
+        df_selected = df_selected.drop(columns=['processed_ticket_price'])
         
          # percentage 값이 20 미만인 데이터 제거
         df_selected = df_selected[df_selected['percentage'] >= 20]
@@ -135,52 +209,120 @@ class Preprocessing:
             df_selected['target'] == 1, 'percentage'
         ]
         
+        # (title, genre) 별 한 행: percentage 와 정규화된 ticket_price
         all_movies = df_selected.groupby(['title', 'genre'], as_index=False).first()
-        
-        negative_samples = []
+        all_movies['ticket_price'] = all_movies['normalized_ticket_price'].round(4)
+        all_movies = all_movies.drop(columns=['normalized_ticket_price'])
+        return positive_df, all_movies
+
+    def negative_plan(self, positive_df, all_movies, ratio=4):
+        """부정 샘플링 계획: 영화별 title/genre 정수 코드와 배열, 배우별 출연 코드와 부정 샘플 수
+
+        배우별 후보 수는 (배우 x 영화) 마스크 없이 계산: 출연하지 않은 장르의 영화 수 - 그 중 출연한 타이틀 행 수
+        """
+        title_codes, titles = pd.factorize(all_movies['title'])
+        genre_codes, genres = pd.factorize(all_movies['genre'])
+        cast_codes, casts = pd.factorize(positive_df['cast'])
+        positive_title_codes = titles.get_indexer(positive_df['title'])
+        positive_genre_codes = genres.get_indexer(positive_df['genre'])
+
+        played_genres = np.zeros((len(casts), len(genres) + 1), dtype=bool)
+        played_genres[cast_codes, positive_genre_codes] = True
+        candidate_counts = (~played_genres[:, :-1]) @ np.bincount(genre_codes, minlength=len(genres))
+        # 출연한 타이틀의 영화 행 중 출연하지 않은 장르인 행 (같은 타이틀이 여러 장르일 수 있음)
+        pairs = pd.DataFrame({'cast': cast_codes, 'title': positive_title_codes}).drop_duplicates()
+        pairs = pairs[pairs['title'] >= 0].merge(
+            pd.DataFrame({'title': title_codes, 'genre': genre_codes}), on='title')
+        pairs = pairs[~played_genres[pairs['cast'].to_numpy(), pairs['genre'].to_numpy()]]
+        candidate_counts -= np.bincount(pairs['cast'], minlength=len(casts))
+
+        # 배우별 부정 샘플 수: 긍정 행 수 x ratio, 후보가 없는 배우(모든 장르 출연) 몫은 나머지 배우에게 긍정 행 수 비율로 배분
+        positive_counts = np.bincount(cast_codes, minlength=len(casts))
+        weights = positive_counts * (candidate_counts > 0)
+        quota = weights * (positive_counts.sum() * ratio) / max(weights.sum(), 1)
+        sample_counts = np.floor(quota).astype(np.int64)
+        remainder = int(round(quota.sum())) - sample_counts.sum()
+        sample_counts[np.argsort(-(quota - sample_counts), kind='stable')[:remainder]] += 1
+
+        # 배우별 출연 title/genre 코드 (배우 코드 순서)
+        order = np.argsort(cast_codes, kind='stable')
+        bounds = np.searchsorted(cast_codes[order], np.arange(len(casts) + 1))
+        actors = [(cast, int(sample_counts[code]),
+                   np.unique(positive_title_codes[order[bounds[code]:bounds[code + 1]]]),
+                   np.unique(positive_genre_codes[order[bounds[code]:bounds[code + 1]]]))
+                  for code, cast in enumerate(casts)]
+        arrays = {
+            'title_codes': title_codes.astype(np.int64),
+            'genre_codes': genre_codes.astype(np.int64),
+            'percentage': np.nan_to_num(all_movies['percentage'].to_numpy(dtype=np.float64)),
+            'ticket_price': all_movies['ticket_price'].fillna(0.01).to_numpy(dtype=np.float64),
+        }
+        return actors, arrays, list(titles), list(genres)
+
+    def sample_negatives(self, positive_df, all_movies, ratio=4):
+        """배우별 부정 샘플: 배우가 출연한 영화와 출연한 장르의 영화를 제외한 영화 중 긍정 행 수 x ratio 개
+
+        배우를 한 번만 묶고 title/genre 를 정수 코드 마스크로 거른 뒤, 배우마다 시드 고정 Generator 의 choice 한 번으로 뽑는다.
+        percentage/ticket_price 는 영화 행 번호로 배열에서 조회.
+        """
+        actors, arrays, titles, genres = self.negative_plan(positive_df, all_movies, ratio)
+        casts, movie_rows = [], []
+        for cast, n, played_titles, played_genres in actors:
+            rows = sample_actor(cast, n, played_titles, played_genres, arrays['title_codes'], arrays['genre_codes'],
+                                len(titles), len(genres), self.seed)
+            casts.extend([cast] * len(rows))
+            movie_rows.append(rows)
+        return negative_frame(casts, np.concatenate(movie_rows).astype(np.int64), titles, genres, arrays)
+
+    def write_sharded(self, positive_df, all_movies, path, ratio=4, workers=None):
+        """배우 묶음(샤드)별 부정 샘플링을 프로세스 풀에서 실행하고 결과를 바로 출력 파일에 이어 붙임
+
+        영화 배열은 공유 메모리로 한 번만 올리고, 각 워커는 parquet 샤드 파일만 쓴 뒤 경로를 반환한다.
+        샤드는 끝나는 대로 배우 순서로 append_tables 에 넘겨 ParquetWriter 하나에 이어 쓰므로 출력은 sample_negatives() 결과와 같다.
+        """
+        actors, arrays, titles, genres = self.negative_plan(positive_df, all_movies, ratio)
+        blocks, specs = [], {}
+        for name in movie_arrays:
+            block = shared_memory.SharedMemory(create=True, size=max(arrays[name].nbytes, 1))
+            np.ndarray(arrays[name].shape, dtype=arrays[name].dtype, buffer=block.buf)[:] = arrays[name]
+            blocks.append(block)
+            specs[name] = (block.name, arrays[name].shape, arrays[name].dtype.str)
+
+        shard_dir = f"{path}.shards"
+        shutil.rmtree(shard_dir, ignore_errors=True)
+        os.makedirs(shard_dir)
+        shards = [actors[i:i + self.shard_size] for i in range(0, len(actors), self.shard_size)]
+        shard_paths = [os.path.join(shard_dir, f"part-{i:05d}.parquet") for i in range(len(shards))]
+        positive_path = os.path.join(shard_dir, "positive.parquet")
+        try:
+            write_table(positive_df, positive_path, storage='parquet', export_json=False)
+            # spawn: 부모 프로세스 상태를 복사하지 않고 공유 메모리 이름으로 연결
+            context = multiprocessing.get_context('spawn')
+            with ProcessPoolExecutor(max_workers=workers or self.workers, mp_context=context,
+                                     initializer=init_sampling_worker,
+                                     initargs=(specs, titles, genres, self.seed)) as executor:
+                # executor.map 은 샤드 순서대로 결과를 내므로, 긍정 샘플 뒤에 끝난 샤드부터 바로 이어 씀
+                rows = append_tables(path, itertools.chain([positive_path], executor.map(sample_shard, shard_paths, shards)),
+                                     storage=storage_format(), export_json=config.storage_export_json)
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+            for block in blocks:
+                block.close()
+                block.unlink()
+        return rows - len(positive_df)
+
+    def preprocessing_data(self):
+        positive_df, all_movies = self.positive_data()
         # 4. 각 배우에 대해 해당 배우가 등장한 영화 외의 영화들에 대해 target=0으로 샘플 생성
-        for _, row in positive_df.iterrows():
-            cast = row['cast']
-            movies_played_by_cast = positive_df[positive_df['cast'] == cast]['title'].unique()
-            genres_played_by_cast = positive_df[positive_df['cast'] == cast]['genre'].unique()
-
-            # 해당 배우가 등장하지 않은 영화들 중 장르가 동일하지 않은 영화만
-            non_cast_movies = all_movies[
-                ~all_movies['title'].isin(movies_played_by_cast) &
-                ~all_movies['genre'].isin(genres_played_by_cast)
-            ]
-            
-            # 긍정 샘플 수에 따라 부정 샘플 수 결정
-            positive_count_for_cast = len(movies_played_by_cast)
-            max_negative_samples_for_cast = positive_count_for_cast * 4
-
-            # 부정 샘플링 (필요한 만큼만)
-            non_cast_movies_sampled = non_cast_movies.sample(
-                n=min(len(non_cast_movies), max_negative_samples_for_cast),
-                random_state=42,
-                replace=False
-            )
-
-            # 샘플링된 영화 데이터를 negative_samples에 추가
-            for _, movie_row in non_cast_movies_sampled.iterrows():
-                matching_movie = all_movies[
-                    (all_movies['title'] == movie_row['title']) &
-                    (all_movies['genre'] == movie_row['genre']) &
-                    (all_movies['percentage'] == movie_row['percentage'])
-                ]
-                normalized_ticket_price = matching_movie['ticket_price'].iloc[0] if not matching_movie.empty else 0.01
-
-                negative_samples.append({
-                    'cast': cast,
-                    'title': movie_row['title'],
-                    'genre': movie_row['genre'],
-                    'percentage': movie_row['percentage'] if not pd.isna(movie_row['percentage']) else 0,
-                    'ticket_price': normalized_ticket_price,
-                    'target': 0
-                })
-
-        # Negative samples DataFrame 생성
-        negative_df = pd.DataFrame(negative_samples)
+        workers = min(self.workers, available_cpus())
+        if workers > 1 and len(positive_df) >= self.parallel_min_rows:
+            negative_count = self.write_sharded(positive_df, all_movies, config.df_with_negatives_path, workers=workers)
+            print(f"Positive count: {len(positive_df)}, Negative count: {negative_count} ({workers} workers)")
+            return
+        if self.workers > 1:
+            reason = f"사용 가능한 CPU {workers}개" if workers <= 1 else f"긍정 {len(positive_df)}행 < {self.parallel_min_rows}행"
+            print(f"순차 샘플링으로 대체 ({reason})")
+        negative_df = self.sample_negatives(positive_df, all_movies)
 
         # Positive와 Negative 데이터 결합
         df_with_negatives = pd.concat([positive_df, negative_df], ignore_index=True)
@@ -200,8 +342,8 @@ class Preprocessing:
                 )
             ], ignore_index=True)
 
-        # 결과 저장
-        df_with_negatives.to_json(config.df_with_negatives_path, orient='records', lines=True, force_ascii=False)
+        # 결과 저장 (설정된 형식 + JSON lines)
+        write_table(df_with_negatives, config.df_with_negatives_path)
 
     def run(self):
         self.load_data()
@@ -210,5 +352,7 @@ class Preprocessing:
 
 
 if __name__ == "__main__":
-    preprocessing_instance = Preprocessing()
+    # --workers N: 배우 묶음별 부정 샘플링을 N 개 프로세스로 병렬 실행 (결과는 워커 수와 무관)
+    workers = int(sys.argv[sys.argv.index("--workers") + 1]) if "--workers" in sys.argv else 1
+    preprocessing_instance = Preprocessing(workers=workers)
     preprocessing_instance.run()
\ No newline at end of file
@@ -9,8 +9,12 @@ import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config
+from storage import read_table, write_table, table_exists
 from dotenv import load_dotenv
 
+# 공연 식별 컬럼: 같은 공연이면 다른 컬럼(예매율, 상태 등)이 바뀌어도 이미 생성한 장르를 유지
+genre_keys = ['title', 'poster']
+
 
 class GenreStoryUpdater:
     def __init__(self):
@@ -71,24 +75,36 @@ class GenreStoryUpdater:
                 print(f"오류 발생: {e}")
                 return "", ""
 
+def merge_genres(processed_df, genre_df):
+    """processed_data 의 행/값에 기존 add_genre_story 의 장르를 붙임 (새 공연은 genre=None 이라 장르 생성 대상)"""
+    genres = genre_df[genre_keys + ['genre']].drop_duplicates(subset=genre_keys)
+    df = processed_df.drop(columns=['genre'], errors='ignore').merge(genres, on=genre_keys, how='left')
+    df['genre'] = df['genre'].astype(object).where(df['genre'].notna(), None)
+    return df
+
+
 def main():
+    load_dotenv()
     # 파일 경로 설정
     add_genre_story_path = f'{config.file_path}/{config.add_genre_file_name}'
-    processed_performance_details_path = f'{config.file_path}/{config.processed_performance_details}'
+    processed_data_path = f'{config.file_path}/{config.processed_data}'
     
     # 파일 존재 여부 확인
-    if os.path.exists(add_genre_story_path):
-        df = pd.read_json(add_genre_story_path)
+    if table_exists(add_genre_story_path) and table_exists(processed_data_path):
+        # processed_data 가 바뀌어 다시 실행된 경우: 이미 생성한 장르는 유지하고 새 공연만 장르 생성
+        df = merge_genres(read_table(processed_data_path), read_table(add_genre_story_path))
+        print(f"장르 생성 대상 (새 공연): {int(df['genre'].isna().sum())} / {len(df)}")
+    elif table_exists(add_genre_story_path):
+        df = read_table(add_genre_story_path)
     else:
-        # processed_perfomance_details.json -> 데이터프레임 생성
-        df = pd.read_json(processed_performance_details_path)
+        # processed_data -> 데이터프레임 생성
+        df = read_table(processed_data_path)
         df['genre'] = None
-        load_dotenv()
     updater = GenreStoryUpdater()
     updater.update_genre_and_story(df)
 
-    # 파일 저장
-    df.to_json(add_genre_story_path, orient='records', lines=True, force_ascii=False)
+    # 파일 저장 (설정된 형식 + JSON lines)
+    write_table(df, add_genre_story_path)
 
 if __name__ == "__main__":
     main()
\ No newline at end of file
@@ -0,0 +1,162 @@
+import hashlib
+import json
+import time
+import numpy as np
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+
+
+def ranking_metrics(scores, relevant, k=10):
+    """(Q, T) 점수/정답 행렬 -> 쿼리별 HR@k, NDCG@k, AP@k 배열 (점수 -inf 는 후보 제외)"""
+    k = min(k, scores.shape[1])
+    rows = np.arange(len(scores))[:, None]
+    top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+    top = np.take_along_axis(top, np.argsort(-scores[rows, top], axis=1, kind='stable'), axis=1)
+    hits = relevant[rows, top] & np.isfinite(scores[rows, top])
+
+    n_relevant = np.minimum(relevant.sum(axis=1), k)
+    discounts = 1.0 / np.log2(np.arange(2, k + 2))
+    dcg = (hits * discounts).sum(axis=1)
+    idcg = np.cumsum(discounts)[np.maximum(n_relevant, 1) - 1]
+    precision_at = np.cumsum(hits, axis=1) / np.arange(1, k + 1)
+    ap = (precision_at * hits).sum(axis=1) / np.maximum(n_relevant, 1)
+    return {
+        'hr': hits.any(axis=1).astype(np.float64),
+        'ndcg': dcg / idcg,
+        'ap': ap,
+    }
+
+
+def summarize(metrics, k):
+    return {
+        'queries': int(len(metrics['hr'])),
+        f'hr@{k}': round(float(metrics['hr'].mean()), 5) if len(metrics['hr']) else None,
+        f'ndcg@{k}': round(float(metrics['ndcg'].mean()), 5) if len(metrics['ndcg']) else None,
+        f'map@{k}': round(float(metrics['ap'].mean()), 5) if len(metrics['ap']) else None,
+    }
+
+
+class RankingEvaluation:
+    """배우(쿼리)별 held-out 긍정 타이틀에 대한 랭킹 평가 (전체 배우 x 전체 타이틀을 한 번에 배치 예측)"""
+
+    def __init__(self, model, num_titles, title_genres, genre_names=None, k=10, model_inputs=None):
+        self.model = model                # model.predict([title, cast, genre]) 인터페이스 (Keras / NumpyDeepFM)
+        self.num_titles = num_titles
+        self.title_genres = title_genres  # (T,) 타이틀 id -> 장르 id
+        self.genre_names = genre_names    # 장르 id -> 이름 (리포트 표시용)
+        self.k = k
+        self.model_inputs = model_inputs  # 해싱 모드면 레이블 id -> 모델 입력 변환 함수
+
+    @staticmethod
+    def title_genre_array(data, num_titles):
+        """인코딩된 데이터에서 타이틀별 장르 id 배열 (타이틀 첫 행 기준)"""
+        first = data.drop_duplicates(subset=['title'])
+        title_genres = np.full(num_titles, -1, dtype=np.int64)
+        title_genres[first['title'].to_numpy(dtype=np.int64)] = first['genre'].to_numpy(dtype=np.int64)
+        return title_genres
+
+    def score_matrix(self, casts):
+        """(배우 수, 타이틀 수) 예측 점수 행렬과 처리량"""
+        titles = np.arange(self.num_titles, dtype=np.int64)
+        title_grid = np.tile(titles, len(casts))
+        cast_grid = np.repeat(casts, len(titles))
+        genre_grid = self.title_genres[title_grid]
+        inputs = [title_grid, cast_grid, genre_grid]
+        if self.model_inputs is not None:
+            inputs = self.model_inputs(*inputs)
+
+        start = time.perf_counter()
+        scores = np.asarray(self.model.predict(inputs, batch_size=65536, verbose=0), dtype=np.float64)
+        seconds = time.perf_counter() - start
+        throughput = {
+            'pairs': int(len(title_grid)),
+            'scoring_s': round(seconds, 4),
+            'pairs_per_sec': round(len(title_grid) / seconds, 1) if seconds else None,
+        }
+        return scores.reshape(len(casts), len(titles)), throughput
+
+    def evaluate(self, train, test):
+        """train/test: 인코딩된 (title, cast, genre, target) DataFrame. test 의 긍정 행을 정답으로 사용"""
+        test_positive = test[test['target'] == 1]
+        train_positive = train[train['target'] == 1]
+        casts = np.unique(test_positive['cast'].to_numpy(dtype=np.int64))
+        cast_rows = {cast: row for row, cast in enumerate(casts)}
+
+        relevant = np.zeros((len(casts), self.num_titles), dtype=bool)
+        relevant[test_positive['cast'].map(cast_rows).to_numpy(), test_positive['title'].to_numpy()] = True
+        # 학습에서 이미 본 (배우, 타이틀) 긍정 조합은 후보에서 제외
+        seen = np.zeros_like(relevant)
+        known = train_positive[train_positive['cast'].isin(cast_rows)]
+        seen[known['cast'].map(cast_rows).to_numpy(), known['title'].to_numpy()] = True
+        seen &= ~relevant
+
+        scores, throughput = self.score_matrix(casts)
+        scores[seen] = -np.inf
+
+        report = {
+            'overall': summarize(ranking_metrics(scores, relevant, self.k), self.k),
+            'genres': {},
+            'throughput': throughput,
+        }
+        # 장르별: 같은 장르 타이틀 안에서의 랭킹 (recommend() 의 장르 후보와 같은 범위)
+        for genre in np.unique(self.title_genres[self.title_genres >= 0]):
+            columns = np.flatnonzero(self.title_genres == genre)
+            queries = np.flatnonzero(relevant[:, columns].any(axis=1))
+            if len(queries) == 0:
+                continue
+            name = self.genre_names[genre] if self.genre_names is not None else int(genre)
+            report['genres'][name] = summarize(
+                ranking_metrics(scores[np.ix_(queries, columns)], relevant[np.ix_(queries, columns)], self.k), self.k)
+        return report
+
+    @staticmethod
+    def model_sha1(model_path):
+        digest = hashlib.sha1()
+        with open(model_path, 'rb') as file:
+            for chunk in iter(lambda: file.read(1 << 20), b''):
+                digest.update(chunk)
+        return digest.hexdigest()
+
+    @staticmethod
+    def save(report, model_path, path=config.evaluation_path):
+        """평가 결과를 평가한 모델 파일(model_path) 해시와 함께 저장"""
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump({**report, 'model_sha1': RankingEvaluation.model_sha1(model_path)}, file, ensure_ascii=False, indent=2)
+
+    @staticmethod
+    def load(model_path, path=config.evaluation_path):
+        """model_path 모델의 평가 결과 (없거나 다른 모델을 평가한 결과면 None)"""
+        try:
+            with open(path, 'r', encoding='utf-8') as file:
+                report = json.load(file)
+        except FileNotFoundError:
+            return None
+        if not os.path.exists(model_path) or report.get('model_sha1') != RankingEvaluation.model_sha1(model_path):
+            return None
+        return report
+
+
+"""저장된 모델 평가: DeepFM 학습과 같은 분리(test_size=0.2, random_state=42)의 검증 행 사용
+(retrain() 이 전체 데이터로 재학습하므로 저장된 모델 기준 수치는 낙관적임 - 학습 중 평가 결과는 evaluation.json)"""
+if __name__ == "__main__":
+    from sklearn.model_selection import train_test_split
+    from encoder_artifact import EncoderArtifact
+    from numpy_model import NumpyDeepFM
+    from storage import read_table
+
+    artifact = EncoderArtifact.load(config.label_encoder_path)
+    encoders = artifact.label_encoders()
+    data = read_table(config.df_with_negatives_path)
+    for column in EncoderArtifact.columns:
+        data[column] = data[column].astype(str).map(encoders[column])
+    data = data.dropna(subset=EncoderArtifact.columns).astype({column: np.int64 for column in EncoderArtifact.columns})
+    train, test = train_test_split(data, test_size=0.2, random_state=42)
+
+    num_titles = artifact.vocab_sizes['title']
+    evaluation = RankingEvaluation(NumpyDeepFM.load(config.numpy_model_path), num_titles,
+                                   RankingEvaluation.title_genre_array(data, num_titles),
+                                   genre_names=artifact.classes['genre'], model_inputs=artifact.model_inputs)
+    print(json.dumps(evaluation.evaluate(train, test), ensure_ascii=False, indent=2))
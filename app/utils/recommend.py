@@ -1,148 +1,384 @@
 import pandas as pd
 import numpy as np
 import pickle
-from DeepFM import weighted_loss, FMInteraction
-from tensorflow.keras.models import load_model
 from datetime import datetime   
+from contextlib import nullcontext
 import sys
 import os
 sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
 import config
+from score_table import ScoreTable
+from encoder_artifact import EncoderArtifact
+from numpy_model import NumpyDeepFM
+from retrieval import TwoTowerRetrieval
+from latency import StageTimer
+from storage import read_table
+
+
+def canonical_titles(titles):
+    """[ ] 안의 지역/회차 표기를 제거한 canonical title 배열"""
+    return pd.Series(titles, dtype=object).str.replace(r'\[.*?\]', '', regex=True).str.strip().to_numpy(dtype=object)
 
 
 class Recommender:
-    def __init__(self):
+    def __init__(self, paths=None):
         self.model = None
         self.data = None
         self.reference_data = None
+        self.score_table = None
+        self.candidates = None
+        self.titles = None
+        self.clean_titles = None
+        self.reference_title_index = None
+        self.reference_canonical_index = None
+        self.end_date_order = None
+        self.sorted_end_dates = None
         self.label_encoders = {}
+        self.encoder_version = None
+        self.encoder_artifact = None
+        self.timer = None
+        self.retrieval = None          # 후보 생성 인덱스 (enable_retrieval 호출 시)
+        self.retrieval_engine = None   # 후보 점수 계산용 NumPy 모델
+        self.n_candidates = None
+        self.title_genres = None       # 타이틀 id -> 장르 id
+        # 모델 파일 경로 (모델 저장소의 버전을 서빙할 때는 ModelRegistry.recommender_paths())
+        self.paths = {
+            'model': config.save_model_path,
+            'numpy_model': config.numpy_model_path,
+            'label_encoders': config.label_encoder_path,
+            'score_table': config.score_table_path,
+            **(paths or {}),
+        }
 
     def load_model(self):
-        """모델 로드"""
+        """모델 로드 (TensorFlow 는 이 경우에만 import)"""
+        from tensorflow.keras.models import load_model
+        from DeepFM import weighted_loss, FMInteraction
         try:
-            self.model = load_model(config.save_model_path, custom_objects={
+            self.model = load_model(self.paths['model'], custom_objects={
                 "weighted_loss": weighted_loss,
                 "FMInteraction": FMInteraction
             })
+            self.candidates = None
         except FileNotFoundError:
             raise FileNotFoundError("저장된 모델을 찾을 수 없음")
 
+    def load_numpy_model(self):
+        """NumPy 추론 엔진 로드 (model.predict 와 같은 인터페이스, TensorFlow 불필요)"""
+        self.model = NumpyDeepFM.load(self.paths['numpy_model'])
+        self.candidates = None
+
     def load_data(self):
         """데이터 로드"""
         try:
-            self.data = pd.read_json(config.df_with_negatives_path, lines=True)
-            # 레이블 인코더 로드
-            for column in ['title', 'cast', 'genre']:
-                self.label_encoders[column] = {val: idx for idx, val in enumerate(self.data[column].unique())}
+            self.data = read_table(config.df_with_negatives_path)
         except FileNotFoundError:
             raise FileNotFoundError("데이터 파일을 찾을 수 없음")
+        # 저장된 레이블 인코더가 없으면 학습과 같은 정렬 순서로 생성
+        if not self.label_encoders:
+            artifact = EncoderArtifact.fit(self.data)
+            self.label_encoders = artifact.label_encoders()
+            self.encoder_version = artifact.version
+            self.encoder_artifact = artifact
+            self.candidates = None
+            self.build_title_arrays()
+
+    def load_label_encoders(self):
+        """학습 시 저장된 레이블 인코더 로드 (학습 데이터 파싱 불필요)"""
+        artifact = EncoderArtifact.load(self.paths['label_encoders'])
+        self.label_encoders = artifact.label_encoders()
+        self.encoder_version = artifact.version
+        self.encoder_artifact = artifact
+        self.candidates = None
+        self.build_title_arrays()
         
     def load_reference_data(self):
         """기준 데이터 로드"""
         try:
-            self.reference_data = pd.read_json(f"{config.file_path}/{config.add_genre_file_name}", lines=True)
+            self.reference_data = read_table(f"{config.file_path}/{config.add_genre_file_name}")
         except FileNotFoundError:
             raise FileNotFoundError("기준 파일을 찾을 수 없습니다.")    
+        self.build_reference_index()
+        self.build_end_date_index()
 
-    def recommend(self, cast, genre):
-        print(f"Debug: 입력된 cast - {cast}")
-        print(f"Debug: 입력된 genre - {genre}")
+    def build_reference_index(self):
+        """기준 데이터 제목/canonical title -> 첫 행 위치 해시 인덱스 (로드 시 한 번만 계산)"""
+        titles = self.reference_data['title'].to_numpy(dtype=object)
+        self.reference_title_index = {}
+        self.reference_canonical_index = {}
+        for position, (title, canonical) in enumerate(zip(titles, canonical_titles(titles))):
+            self.reference_title_index.setdefault(title, position)
+            self.reference_canonical_index.setdefault(canonical, position)
 
-        cast_encoded = self.label_encoders['cast'][cast]
-        genre_encoded = self.label_encoders['genre'][genre]
-        
-        # 데이터셋 전체를 사용하여 예측
+    def build_end_date_index(self):
+        """end_date 를 한 번만 파싱하여 종료일 기준 정렬 인덱스 생성"""
+        end_dates = pd.to_datetime(self.reference_data['end_date'], format='%Y.%m.%d', errors='coerce')
+        end_dates = end_dates.to_numpy(dtype='datetime64[D]')
+        valid = np.flatnonzero(~np.isnat(end_dates))
+        order = valid[np.argsort(end_dates[valid], kind='stable')]
+        self.end_date_order = order
+        self.sorted_end_dates = end_dates[order]
+
+    def active_positions(self, now=None):
+        """현재 상영 중(end_date > 오늘)인 기준 데이터 행 위치 (이진 탐색)"""
+        today = np.datetime64((now or datetime.now()).date(), 'D')
+        start = np.searchsorted(self.sorted_end_dates, today, side='right')
+        return self.end_date_order[start:]
+
+    def active_reference_data(self, now=None):
+        """현재 상영 중인 기준 데이터"""
+        return self.reference_data.iloc[np.sort(self.active_positions(now))]
+
+    def active_title_ids(self, now=None):
+        """현재 상영 중인 타이틀의 인코딩 id 배열"""
+        title_encoder = self.label_encoders['title']
+        titles = self.reference_data['title'].to_numpy()[self.active_positions(now)]
+        return np.unique([title_encoder[title] for title in titles if title in title_encoder]).astype(np.int64)
+
+    def load_score_table(self):
+        """사전 계산된 점수 테이블 로드 (요청 시 모델 예측 불필요)"""
+        self.score_table = ScoreTable.load(self.paths['score_table'])
+        if self.encoder_version is not None and self.score_table.encoder_version != self.encoder_version:
+            raise ValueError("점수 테이블이 현재 레이블 인코더와 맞지 않음 (score_table.py 재실행 필요)")
+        # 점수 테이블의 id 사전으로 인코딩을 맞춤
+        self.label_encoders = self.score_table.label_encoders()
+        self.encoder_version = self.score_table.encoder_version
+        self.candidates = None
+        self.build_title_arrays()
+
+    def predict_candidates(self, title_ids=None):
+        """(title, cast, genre) 인코딩 값과 predicted_score 를 담은 DataFrame 반환 (title_ids 가 있으면 해당 타이틀만)"""
+        if self.score_table is not None:
+            X = self.score_table.frame()
+            return X if title_ids is None else X[X['title'].isin(title_ids)]
+
+        # 점수 테이블이 없으면 데이터셋 전체를 사용하여 예측
         X = self.data[['title', 
                     'cast',
                     'genre', 
                     # 'percentage',
                     # 'ticket_price'
                     ]].copy()
-        title_encoder = self.label_encoders['title']
-        cast_encoder = {v: k for k, v in self.label_encoders['cast'].items()}
-        genre_encoder = {v: k for k, v in self.label_encoders['genre'].items()}
-        
         # 데이터 인코딩
-        X['title'] = X['title'].map(title_encoder)
+        X['title'] = X['title'].map(self.label_encoders['title'])
         X['cast'] = X['cast'].map(self.label_encoders['cast'])
         X['genre'] = X['genre'].map(self.label_encoders['genre'])
         # 중복 제거
         X = X.drop_duplicates(subset=['title', 'cast', 'genre'])
+        if title_ids is not None:
+            X = X[X['title'].isin(title_ids)]
         
-        predictions = self.model.predict([X['title'].values, 
-                                        X['cast'].values, 
-                                        X['genre'].values,
-                                        # X['percentage'].values,
-                                        # X['ticket_price'].values,
-                                          ])
+        predictions = self.model.predict(self.model_inputs(X['title'].values, 
+                                                          X['cast'].values, 
+                                                          X['genre'].values,
+                                                          # X['percentage'].values,
+                                                          # X['ticket_price'].values,
+                                                          ))
         X['predicted_score'] = predictions
+        return X
 
-        # 입력된 장르로 필터링
-        genre_filtered_data = X[X['genre'] == genre_encoded]
-        cast_filtered_data = X[X['cast'] == cast_encoded]
-
-        # 1. 장르 기반 추천 10개
-        genre_top_titles = genre_filtered_data.sort_values(by='predicted_score', ascending=False).head(15)
-        # 2. 배우 기반 추천 10개
-        cast_top_titles = cast_filtered_data.sort_values(by='predicted_score', ascending=False).head(15)
-        # 3. 병합 후 중복 제거
-        combined_titles = pd.concat([genre_top_titles, cast_top_titles])
-        # 4. 예측 점수 기준으로 정렬
-        top_titles = combined_titles.sort_values(by='predicted_score', ascending=False)
-        # 디코딩
-        top_titles['decoded_title'] = top_titles['title'].map({v: k for k, v in title_encoder.items()})
-        top_titles['decoded_genre'] = top_titles['genre'].map({v: k for k, v in genre_encoder.items()})
-        top_titles['decoded_cast'] = top_titles['cast'].map(cast_encoder)
-        
-        # [ ] 제거 및 중복 처리
-        top_titles['clean_title'] = top_titles['decoded_title'].str.replace(r'\[.*?\]', '', regex=True).str.strip()
-        top_titles = top_titles.drop_duplicates(subset=['clean_title'])
-
-        matched_recommendations = self.reference_data[self.reference_data['title'].isin(top_titles['clean_title'])]
-        matched_recommendations.loc[:, 'clean_title'] = matched_recommendations['title'].str.replace(r'\[.*?\]', '', regex=True).str.strip()
-        matched_recommendations = matched_recommendations.drop_duplicates(subset=['clean_title'])
-
-        # 최종 데이터 결합
-        final_recommendations = matched_recommendations.merge(
-            top_titles[['clean_title', 'predicted_score']],
-            on='clean_title'
-        ).sort_values(by='predicted_score', ascending=False)
-
-        # 10개 미만이면 필터링되지 않은 데이터 중 추가
-        if len(final_recommendations) < 10:
-            missing_count = 10 - len(final_recommendations)
-            # 이미 포함된 데이터 제외
-            excluded_titles = final_recommendations['title'].tolist() + genre_top_titles['title'].tolist() + cast_top_titles['title'].tolist()
-            unfiltered_data = self.data[~self.data['title'].isin(excluded_titles)]
-            # top_titles와 unfiltered_data 매칭
-            matched_data = unfiltered_data.merge(
-                top_titles[['decoded_title', 'predicted_score']],
-                left_on='title',
-                right_on='decoded_title'
-            ).drop_duplicates(subset=['title'])
-            
-            # 추가할 데이터
-            additional_recommendations = matched_data.sort_values(by='predicted_score', ascending=False).head(missing_count)
-            matched_reference_data = self.reference_data[
-                self.reference_data['title'].str.contains('|'.join(additional_recommendations['title']), na=False)
-            ]
-            # 중복 제거를 위한 임시 컬럼
-            matched_reference_data['clean_title'] = matched_reference_data['title'].str.replace(r'\[.*?\]', '', regex=True).str.strip()
-
-            # 'clean_title' 기준으로 중복 제거 (첫 번째로 나온 데이터만 유지)
-            matched_reference_data = matched_reference_data.drop_duplicates(subset=['clean_title'])
-
-            score_mapping = dict(zip(additional_recommendations['title'], additional_recommendations['predicted_score']))
-            matched_reference_data['predicted_score'] = matched_reference_data['clean_title'].map(score_mapping)            
-
-            # 'clean_title' 컬럼 삭제
-            matched_reference_data = matched_reference_data.drop(columns=['clean_title'])
-
-            # 최종 결합
-            final_recommendations = pd.concat([final_recommendations, matched_reference_data]).sort_values(by='predicted_score', ascending=False).head(10)
-
-        # 10개만 반환하도록 처리
-        final_recommendations = final_recommendations.head(10).iloc[::-1]
+    def model_inputs(self, title, cast, genre):
+        """레이블 id -> 모델 입력 (해싱 모드면 버킷 id 로 변환)"""
+        if self.encoder_artifact is None:
+            return [title, cast, genre]
+        return self.encoder_artifact.model_inputs(title, cast, genre)
+
+    def model_ids(self, column, ids):
+        """레이블 id -> 모델 입력 id (해싱 컬럼이 아니면 그대로)"""
+        ids = np.asarray(ids, dtype=np.int64)
+        if not self.hashed(column):
+            return ids
+        return self.encoder_artifact.model_lookup(column)[ids]
+
+    def hashed(self, column):
+        """해싱 모드로 학습된 컬럼인지 (처음 보는 값도 점수 계산 가능)"""
+        return self.encoder_artifact is not None and column in self.encoder_artifact.hash_buckets
+
+    def rank_new_cast(self, cast, genre_encoded, k=15):
+        """처음 보는 배우 (해싱 모드): 배우의 해시 버킷으로 타이틀별 점수를 바로 계산하여 후보 생성
+        (장르 상위 후보 + 새 배우 상위 후보를 담은 후보 배열과 병합된 인덱스 반환)"""
+        candidates = self.candidate_arrays()
+        genre_top = self.top_k(np.flatnonzero(candidates['genre'] == genre_encoded), candidates['score'], k)
+
+        # 타이틀별 대표 (title, genre) 한 행에 대해 예측
+        _, first = np.unique(candidates['title'], return_index=True)
+        title_ids, genre_ids = candidates['title'][first], candidates['genre'][first]
+        if self.model is None:
+            self.load_numpy_model()
+        inputs = self.encoder_artifact.model_inputs(title_ids, np.zeros_like(title_ids), genre_ids)
+        inputs[1] = np.full(len(title_ids), self.encoder_artifact.model_ids('cast', [cast])[0])
+        scores = np.asarray(self.model.predict(inputs, verbose=0), dtype=np.float32).reshape(-1)
+
+        local = {
+            'title': np.concatenate([candidates['title'][genre_top], title_ids]),
+            'cast': np.concatenate([candidates['cast'][genre_top], np.full(len(title_ids), -1)]),
+            'genre': np.concatenate([candidates['genre'][genre_top], genre_ids]),
+            'score': np.concatenate([candidates['score'][genre_top], scores]),
+        }
+        cast_top = len(genre_top) + self.top_k(np.arange(len(title_ids)), scores, k)
+        return self.merge_top(np.arange(len(genre_top)), cast_top, local), local
+
+    def title_genre_ids(self):
+        """타이틀 id -> 장르 id 배열 (점수 테이블 또는 학습 데이터 기준)"""
+        if self.score_table is not None:
+            title_ids, genre_ids = self.score_table.triples[:, 0], self.score_table.triples[:, 2]
+        else:
+            title_ids = self.data['title'].map(self.label_encoders['title']).to_numpy()
+            genre_ids = self.data['genre'].map(self.label_encoders['genre']).to_numpy()
+        title_genres = np.full(len(self.titles), -1, dtype=np.int64)
+        title_genres[np.asarray(title_ids, dtype=np.int64)] = genre_ids
+        return title_genres
+
+    def enable_retrieval(self, n_candidates=300, rank=16, nlist=None, nprobe=8):
+        """후보 생성 단계 사용: 배우/타이틀 벡터 내적 인덱스로 n_candidates 개 타이틀만 가져온 뒤 DeepFM 으로 점수 계산
+        (n_candidates=None 이면 전체 타이틀, nlist 를 주면 IVF, 없으면 flat)"""
+        if self.model is None:
+            self.load_numpy_model()
+        engine = self.model if isinstance(self.model, NumpyDeepFM) else NumpyDeepFM.from_keras(self.model)
+        self.retrieval_engine = engine
+        self.n_candidates = n_candidates
+        self.title_genres = self.title_genre_ids()
+
+        # 인덱스 생성 시 한 번만: 전체 배우 x 타이틀 점수로 두 타워 벡터 근사
+        title_ids = np.flatnonzero(self.title_genres >= 0)
+        cast_ids = np.arange(len(self.label_encoders['cast']))
+        scores = engine.predict([np.tile(self.model_ids('title', title_ids), len(cast_ids)),
+                                 np.repeat(self.model_ids('cast', cast_ids), len(title_ids)),
+                                 np.tile(self.model_ids('genre', self.title_genres[title_ids]), len(cast_ids))])
+        self.retrieval = TwoTowerRetrieval(scores.reshape(len(cast_ids), len(title_ids)), title_ids,
+                                           self.title_genres[title_ids], rank=rank, nlist=nlist, nprobe=nprobe)
+        return self.retrieval
+
+    def rank_retrieval(self, cast, genre_encoded, k=15):
+        """후보 생성 인덱스로 가져온 타이틀만 (타이틀, 배우, 타이틀 장르) 로 점수 계산 후
+        장르 일치 상위 k개 + 전체 상위 k개 병합 (후보 배열과 병합된 인덱스 반환)"""
+        cast_encoded = self.label_encoders['cast'].get(cast)
+        if cast_encoded is not None:
+            cast_model_id = self.model_ids('cast', [cast_encoded])[0]
+        else:
+            # 해싱 모드에서 처음 보는 배우
+            cast_model_id = self.encoder_artifact.model_ids('cast', [cast])[0]
+
+        if self.n_candidates is None:
+            title_ids = np.flatnonzero(self.title_genres >= 0)
+        else:
+            title_ids = self.retrieval.search(cast_encoded, genre_encoded, self.n_candidates)
+        genre_ids = self.title_genres[title_ids]
+        inputs = [self.model_ids('title', title_ids), np.full(len(title_ids), cast_model_id),
+                  self.model_ids('genre', genre_ids)]
+        scores = np.asarray(self.retrieval_engine.predict(inputs), dtype=np.float32).reshape(-1)
+
+        local = {
+            'title': title_ids,
+            'cast': np.full(len(title_ids), -1),
+            'genre': genre_ids,
+            'score': scores,
+        }
+        genre_top = self.top_k(np.flatnonzero(genre_ids == genre_encoded), scores, k)
+        cast_top = self.top_k(np.arange(len(title_ids)), scores, k)
+        return self.merge_top(genre_top, cast_top, local), local
+
+    def candidate_arrays(self):
+        """후보 전체의 인코딩 값/점수를 정수·실수 배열로 캐싱"""
+        if self.candidates is None:
+            X = self.predict_candidates()
+            self.candidates = {
+                'title': X['title'].to_numpy(dtype=np.int64),
+                'cast': X['cast'].to_numpy(dtype=np.int64),
+                'genre': X['genre'].to_numpy(dtype=np.int64),
+                'score': X['predicted_score'].to_numpy(dtype=np.float32).reshape(-1),
+            }
+        return self.candidates
+
+    def build_title_arrays(self):
+        """id -> 제목, id -> [ ] 제거 제목 배열을 한 번만 계산"""
+        title_encoder = self.label_encoders['title']
+        titles = np.empty(len(title_encoder), dtype=object)
+        for title, idx in title_encoder.items():
+            titles[idx] = title
+        self.titles = titles
+        self.clean_titles = canonical_titles(titles)
+
+    @staticmethod
+    def top_k(indices, scores, k):
+        """indices 중 점수 상위 k개를 점수 내림차순으로 반환"""
+        if len(indices) > k:
+            indices = indices[np.argpartition(-scores[indices], k - 1)[:k]]
+        return indices[np.argsort(-scores[indices], kind='stable')]
+
+    def rank(self, cast_encoded, genre_encoded, k=15):
+        """장르/배우 기반 상위 후보를 병합해 clean_title 기준 중복 제거된 후보 인덱스 반환"""
+        candidates = self.candidate_arrays()
+        scores = candidates['score']
+
+        # 1. 장르 기반 추천 상위 k개
+        genre_top = self.top_k(np.flatnonzero(candidates['genre'] == genre_encoded), scores, k)
+        # 2. 배우 기반 추천 상위 k개
+        cast_top = self.top_k(np.flatnonzero(candidates['cast'] == cast_encoded), scores, k)
+        return self.merge_top(genre_top, cast_top)
+
+    def merge_top(self, genre_top, cast_top, candidates=None):
+        """장르/배우 상위 후보 병합 후 점수순 정렬 및 clean_title 기준 중복 제거"""
+        if candidates is None:
+            candidates = self.candidate_arrays()
+        scores = candidates['score']
+
+        # 3. 병합 후 예측 점수 기준으로 정렬
+        combined = np.concatenate([genre_top, cast_top])
+        combined = combined[np.argsort(-scores[combined], kind='stable')]
+        # 4. [ ] 제거 제목 기준 중복 제거 (점수가 높은 첫 번째만 유지)
+        _, first = np.unique(self.clean_titles[candidates['title'][combined]], return_index=True)
+        return combined[np.sort(first)]
+
+    def encode_query(self, cast, genre):
+        """(cast, genre) -> (배우 id, 장르 id). 해싱 모드에서 처음 보는 배우는 배우 id 가 None (해시 버킷으로 점수 계산)
+        점수를 계산할 수 없는 조합(처음 보는 장르, 해싱 모드가 아닌데 처음 보는 배우)은 KeyError"""
+        if cast not in self.label_encoders['cast'] and self.hashed('cast'):
+            cast_encoded = None
+        else:
+            cast_encoded = self.label_encoders['cast'][cast]
+        return cast_encoded, self.label_encoders['genre'][genre]
+
+    def rank_query(self, cast, cast_encoded, genre_encoded):
+        """조회 방식별 상위 후보 (후보 생성 인덱스 / 처음 보는 배우 해시 버킷 / 후보 전체 점수)
+        병합된 인덱스와 후보 배열(후보 전체 점수를 쓰면 None) 반환"""
+        if self.retrieval is not None:
+            return self.rank_retrieval(cast, genre_encoded)
+        if cast_encoded is None:
+            return self.rank_new_cast(cast, genre_encoded)
+        return self.rank(cast_encoded, genre_encoded), None
+
+    def enable_timing(self, timer=None):
+        """단계별 소요 시간 측정 활성화 (encode, candidates, rank, reference_merge, total)"""
+        self.timer = timer or StageTimer()
+        return self.timer
+
+    def stage(self, name):
+        return self.timer.stage(name) if self.timer is not None else nullcontext()
+
+    def recommend(self, cast, genre):
+        print(f"Debug: 입력된 cast - {cast}")
+        print(f"Debug: 입력된 genre - {genre}")
+
+        with self.stage('total'):
+            with self.stage('encode'):
+                # 해싱 모드면 처음 보는 배우도 재학습 없이 추천
+                cast_encoded, genre_encoded = self.encode_query(cast, genre)
+
+            # 후보 전체 점수 (점수 테이블 조회 또는 모델 예측, 첫 호출 이후 캐시)
+            # 후보 생성 인덱스를 쓰면 전체 카탈로그 점수 계산 생략
+            with self.stage('candidates'):
+                if self.retrieval is None:
+                    self.candidate_arrays()
+
+            # 후보 전체 점수에서 상위 후보 선택 (NumPy) 후 기준 데이터와 매칭
+            with self.stage('rank'):
+                top, candidates = self.rank_query(cast, cast_encoded, genre_encoded)
+            with self.stage('reference_merge'):
+                final_recommendations = self.match_reference(top, candidates=candidates)
+
+                # 10개만 반환하도록 처리
+                final_recommendations = final_recommendations.iloc[::-1]
 
         # 결과 출력
         return final_recommendations[['poster', 'title', 'place', 'cast', 'genre', 'ticket_price']]
@@ -150,49 +386,109 @@ class Recommender:
         """콘솔 테스트용 출력 코드"""    
         # return final_recommendations[['title', 'genre', 'cast', 'predicted_score']]            
 
+    def recommend_many(self, pairs, k=15):
+        """여러 (cast, genre) 조합을 한 번에 추천 (recommend() 와 같은 인코딩/조회 방식, 후보 전체 점수를 쓰면
+        장르/배우별 상위 후보를 조합 간 공유). 점수를 계산할 수 없는 조합은 결과에서 빠짐"""
+        genre_tops, cast_tops = {}, {}
+        frames = []
+        for cast, genre in pairs:
+            try:
+                cast_encoded, genre_encoded = self.encode_query(cast, genre)
+            except KeyError:
+                continue
+
+            if self.retrieval is None and cast_encoded is not None:
+                candidates = self.candidate_arrays()
+                if genre_encoded not in genre_tops:
+                    genre_tops[genre_encoded] = self.top_k(np.flatnonzero(candidates['genre'] == genre_encoded),
+                                                           candidates['score'], k)
+                if cast_encoded not in cast_tops:
+                    cast_tops[cast_encoded] = self.top_k(np.flatnonzero(candidates['cast'] == cast_encoded),
+                                                         candidates['score'], k)
+                top, candidates = self.merge_top(genre_tops[genre_encoded], cast_tops[cast_encoded]), None
+            else:
+                top, candidates = self.rank_query(cast, cast_encoded, genre_encoded)
+
+            final_recommendations = self.match_reference(top, candidates=candidates)
+            frames.append(pd.DataFrame({
+                'query_cast': cast,
+                'query_genre': genre,
+                'rank': np.arange(1, len(final_recommendations) + 1),
+            }).join(final_recommendations.reset_index(drop=True)))
+
+        columns = ['query_cast', 'query_genre', 'rank', 'poster', 'title', 'place', 'cast', 'genre', 'ticket_price', 'predicted_score']
+        if not frames:
+            return pd.DataFrame(columns=columns)
+        return pd.concat(frames, ignore_index=True)[columns]
+
+    def match_reference(self, top, limit=10, candidates=None):
+        """상위 후보 인덱스를 기준 데이터(포스터, 장소, 가격)와 매칭하여 점수순 최대 limit 개 반환"""
+        if candidates is None:
+            candidates = self.candidate_arrays()
+        title_ids = candidates['title'][top]
+        decoded_titles = self.titles[title_ids]
+        clean_titles = self.clean_titles[title_ids]
+        scores = candidates['score'][top]
+
+        # 1. [ ] 제거 제목과 기준 데이터 제목이 정확히 같은 행 (후보는 이미 점수순, clean_title 중복 없음)
+        rows, row_scores, matched = [], [], set()
+        for clean_title, score in zip(clean_titles, scores):
+            position = self.reference_title_index.get(clean_title)
+            if position is not None:
+                rows.append(position)
+                row_scores.append(score)
+                matched.add(clean_title)
+
+        # 2. limit 개 미만이면 canonical title 이 같은 기준 데이터로 보충 (예: "제목 [부산]" 공연)
+        for decoded_title, clean_title, score in zip(decoded_titles, clean_titles, scores):
+            if len(rows) >= limit:
+                break
+            if decoded_title in matched or clean_title in matched:
+                continue
+            position = self.reference_canonical_index.get(clean_title)
+            if position is not None:
+                rows.append(position)
+                row_scores.append(score)
+                matched.add(clean_title)
+
+        final_recommendations = self.reference_data.iloc[rows].assign(predicted_score=row_scores)
+        return final_recommendations.sort_values(by='predicted_score', ascending=False, kind='stable').head(limit)
+
     def score(self, cast, genre):
         # 1. 데이터 인코딩
         cast_encoded = self.label_encoders['cast'].get(cast, -1)
         genre_encoded = self.label_encoders['genre'].get(genre, -1)
 
-        if cast_encoded == -1 or genre_encoded == -1:
+        if (cast_encoded == -1 and not self.hashed('cast')) or genre_encoded == -1:
             return []
 
-        X = self.data.copy()
-        title_encoder = self.label_encoders['title']
+        # 2. 현재 상영 중인 타이틀 (종료일 정렬 인덱스에서 이진 탐색)
+        active_ids = self.active_title_ids()
+        if len(active_ids) == 0:
+            print("[DEBUG] 현재 상영 중인 타이틀이 없습니다.")
+            return []
 
-        X['title'] = X['title'].map(title_encoder)
-        X['cast'] = X['cast'].map(self.label_encoders['cast'])
-        X['genre'] = X['genre'].map(self.label_encoders['genre'])
-        
-        # NaN 제거
-        X = X.dropna(subset=['title', 'cast', 'genre'])
-        
-        # 2. 모델 예측
+        # 3. 상영 중인 후보만 점수 계산 (점수 테이블/캐시가 있으면 조회만)
         try:
-            predictions = self.model.predict([X['title'].values, 
-                                            X['cast'].values, 
-                                            X['genre'].values])
-            X['predicted_score'] = predictions
+            if self.candidates is not None or self.score_table is not None:
+                candidates = self.candidate_arrays()
+                active = np.flatnonzero(np.isin(candidates['title'], active_ids))
+                title_ids, scores = candidates['title'][active], candidates['score'][active]
+            else:
+                X = self.predict_candidates(active_ids)
+                title_ids = X['title'].to_numpy(dtype=np.int64)
+                scores = X['predicted_score'].to_numpy(dtype=np.float32).reshape(-1)
         except Exception as e:
             print(f"[ERROR] 모델 예측 중 오류 발생: {e}")
             return []
 
-        # 3. 현재 상영 중인 데이터 필터링
-        current_date = datetime.now().strftime('%Y.%m.%d')
-        active_data = self.reference_data[self.reference_data["end_date"] > current_date]
-        active_titles = set(active_data["title"])
-
-        # 4. 점수가 계산된 데이터와 상영 중인 데이터 매칭
-        X = X[X['title'].isin([title_encoder.get(title, -1) for title in active_titles])]
-        
-        if X.empty:
+        if len(scores) == 0:
             print("[DEBUG] 현재 상영 중인 타이틀이 없습니다.")
             return []
 
-        # 5. 상위 5개 타이틀 반환
-        top_recommendations = X.sort_values(by="predicted_score", ascending=False).head(7)
-        top_titles = top_recommendations['title'].map({v: k for k, v in title_encoder.items()}).tolist()
+        # 4. 상위 7개 타이틀 반환
+        top = self.top_k(np.arange(len(scores)), scores, 7)
+        top_titles = self.titles[title_ids[top]].tolist()
         print("[DEBUG] Top 7 Recommended Titles:", top_titles)
         return top_titles
 
@@ -0,0 +1,111 @@
+import hashlib
+import threading
+from collections import OrderedDict
+import pandas as pd
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+from storage import table_path
+
+
+def artifact_version(paths=None):
+    """모델/인코더/점수 테이블/기준 데이터/추천 코드 내용으로 만든 버전 (하나라도 바뀌면 달라짐)
+    paths: Recommender.paths 형식 (모델 저장소 버전 파일은 학습 결과와 내용이 같으므로 같은 값)"""
+    paths = paths or {
+        'model': config.save_model_path,
+        'label_encoders': config.label_encoder_path,
+        'score_table': config.score_table_path,
+    }
+    digest = hashlib.sha1()
+    paths = [
+        paths['model'],
+        paths['label_encoders'],
+        os.path.join(paths['score_table'], "scores.npy"),
+        table_path(f"{config.file_path}/{config.add_genre_file_name}") or f"{config.file_path}/{config.add_genre_file_name}",
+        os.path.join(os.path.dirname(os.path.abspath(__file__)), "recommend.py"),
+    ]
+    for path in paths:
+        if os.path.exists(path):
+            with open(path, 'rb') as file:
+                for chunk in iter(lambda: file.read(1 << 20), b''):
+                    digest.update(chunk)
+        digest.update(os.path.basename(path).encode('utf-8'))
+    return digest.hexdigest()[:12]
+
+
+class RecommendationCache:
+    """(cast, genre, 모델 버전) 별 추천 결과 캐시: 프로세스 내 LRU + 선택적 디스크 저장소"""
+    display_columns = ['poster', 'title', 'place', 'cast', 'genre', 'ticket_price']
+
+    def __init__(self, max_size=4096, disk_path=config.recommend_cache_path):
+        self.max_size = max_size
+        self.disk_path = disk_path  # None 이면 디스크 저장소 사용 안 함
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, cast, genre, version):
+        key = (cast, genre, version)
+        with self.lock:
+            if key not in self.entries:
+                return None
+            self.entries.move_to_end(key)
+            return self.entries[key]
+
+    def put(self, cast, genre, version, recommendations):
+        with self.lock:
+            self.entries[(cast, genre, version)] = recommendations
+            self.entries.move_to_end((cast, genre, version))
+            while len(self.entries) > self.max_size:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+    def disk_file(self, version):
+        return os.path.join(self.disk_path, f"{version}.parquet")
+
+    def save(self, version, frame):
+        """recommend_many 결과를 버전별 파일로 저장하고 이전 버전 파일은 삭제"""
+        os.makedirs(self.disk_path, exist_ok=True)
+        tmp_path = f"{self.disk_file(version)}.tmp"
+        frame.to_parquet(tmp_path, index=False)
+        os.replace(tmp_path, self.disk_file(version))
+        for file_name in os.listdir(self.disk_path):
+            if file_name.endswith('.parquet') and file_name != f"{version}.parquet":
+                os.remove(os.path.join(self.disk_path, file_name))
+
+    def load(self, version):
+        """현재 버전의 디스크 저장소를 LRU 에 적재 (없으면 0 반환)"""
+        if self.disk_path is None or not os.path.exists(self.disk_file(version)):
+            return 0
+        frame = pd.read_parquet(self.disk_file(version))
+        count = 0
+        for (cast, genre), group in frame.groupby(['query_cast', 'query_genre'], sort=False):
+            # recommend() 와 같은 형태: 점수 오름차순 표시
+            recommendations = group.sort_values('rank', ascending=False)[self.display_columns].reset_index(drop=True)
+            self.put(cast, genre, version, recommendations)
+            count += 1
+        return count
+
+
+def precompute_cache():
+    """모든 배우 x 장르 추천 결과를 미리 계산해 현재 모델/기준 데이터 버전으로 디스크에 저장"""
+    from recommend import Recommender
+
+    recommender = Recommender()
+    recommender.load_label_encoders()
+    recommender.load_score_table()
+    recommender.load_reference_data()
+
+    version = artifact_version()
+    pairs = [(cast, genre) for cast in recommender.label_encoders['cast'] for genre in config.unique_genres]
+    frame = recommender.recommend_many(pairs)
+    RecommendationCache().save(version, frame)
+    print(f"추천 캐시 저장 완료: {len(pairs)}개 조합 (version {version}) -> {config.recommend_cache_path}")
+    return version
+
+
+if __name__ == "__main__":
+    precompute_cache()
@@ -0,0 +1,139 @@
+import threading
+import time
+from contextlib import nullcontext
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+from recommend import Recommender
+from recommendation_cache import RecommendationCache, artifact_version
+from model_registry import ModelRegistry
+from latency import StageTimer
+from storage import table_path
+
+
+class RecommenderService:
+    """프로세스 전체에서 공유하는 Recommender (지연 초기화 + 모델 파일 변경 시 재로딩)"""
+    instance = None
+    instance_lock = threading.Lock()
+
+    @staticmethod
+    def get():
+        if RecommenderService.instance is None:
+            with RecommenderService.instance_lock:
+                if RecommenderService.instance is None:
+                    RecommenderService.instance = RecommenderService()
+        return RecommenderService.instance
+
+    def __init__(self, check_interval=5.0):
+        self.recommender = None
+        self.version = None
+        self.model_version = None  # 모델 저장소 버전 (저장소를 쓰지 않으면 None)
+        self.registry = ModelRegistry()
+        self.cache = RecommendationCache()
+        self.loaded_mtimes = None
+        self.check_interval = check_interval  # 파일 변경 확인 최소 간격 (초)
+        self.last_checked = 0.0
+        self.lock = threading.Lock()
+        # RECOMMEND_TIMING=1 이면 단계별 지연 시간을 100 요청마다 JSON 으로 출력
+        self.timer = StageTimer(emit_every=100) if os.getenv("RECOMMEND_TIMING") == "1" else None
+        # RECOMMEND_RETRIEVAL=1 이면 두 타워 후보 생성 후 후보만 DeepFM(NumPy) 으로 점수 계산
+        self.retrieval = os.getenv("RECOMMEND_RETRIEVAL") == "1"
+
+    def artifact_mtimes(self):
+        """서빙 상태: 모델 저장소 현재 버전 + 서빙에 쓰는 파일들의 수정 시각
+        (저장소 버전 디렉토리는 한 번 쓰면 바뀌지 않으므로 CURRENT 만 바뀌면 재로딩)"""
+        model_version = self.registry.current_version()
+        paths = [table_path(f"{config.file_path}/{config.add_genre_file_name}") or f"{config.file_path}/{config.add_genre_file_name}"]
+        if model_version is None:
+            paths += [
+                config.save_model_path,
+                config.label_encoder_path,
+                os.path.join(config.score_table_path, "scores.npy"),
+            ]
+        return (model_version,) + tuple(os.path.getmtime(path) if os.path.exists(path) else None for path in paths)
+
+    def load(self):
+        """새 Recommender 를 모두 로드한 뒤 교체 (로드 중에도 이전 인스턴스로 응답)"""
+        mtimes = self.artifact_mtimes()
+        model_version = mtimes[0]
+        # 모델 저장소에 등록된 버전이 있으면 해당 버전 디렉토리에서, 없으면 기존 경로에서 로드
+        paths = self.registry.recommender_paths(model_version) if model_version else None
+        recommender = Recommender(paths)
+        recommender.load_label_encoders()
+        recommender.load_score_table()
+        recommender.load_reference_data()
+        if self.timer is not None:
+            recommender.enable_timing(self.timer)
+        if self.retrieval:
+            recommender.enable_retrieval()
+        version = artifact_version(recommender.paths)
+        if self.retrieval:
+            # 미리 계산된 디스크 캐시는 전체 후보 기준 결과이므로 다른 버전으로 구분
+            version = f"{version}-retrieval"
+
+        # 이전 버전 캐시는 더 이상 조회되지 않으므로 비우고, 미리 계산된 결과가 있으면 적재
+        self.cache.clear()
+        cached = self.cache.load(version)
+        self.recommender, self.version, self.model_version = recommender, version, model_version
+        self.loaded_mtimes = mtimes
+        print(f"[RecommenderService] 추천 모델 로드 완료 (model {model_version}, version {version}, 캐시 {cached}개)")
+
+    def ready(self):
+        """서빙할 모델 파일이 있는지 (로드하지 않고 확인만, 처음 실행 시 파이프라인이 모델을 만들기 전에는 False)"""
+        if self.recommender is not None or self.registry.current_version() is not None:
+            return True
+        paths = [config.label_encoder_path, os.path.join(config.score_table_path, "scores.npy"),
+                 table_path(f"{config.file_path}/{config.add_genre_file_name}")]
+        return all(path is not None and os.path.exists(path) for path in paths)
+
+    def warmup(self):
+        """앱 시작 시 명시적으로 호출하여 첫 요청이 로딩 비용을 내지 않도록 함"""
+        with self.lock:
+            if self.recommender is None:
+                self.load()
+        return self
+
+    def current(self):
+        """최신 Recommender 반환 (파일이 바뀌었으면 재로딩)"""
+        if self.recommender is None:
+            return self.warmup().recommender
+
+        now = time.monotonic()
+        if now - self.last_checked < self.check_interval:
+            return self.recommender
+        self.last_checked = now
+
+        if self.artifact_mtimes() != self.loaded_mtimes and self.lock.acquire(blocking=False):
+            try:
+                self.load()
+            except Exception as e:
+                # 새 파일이 아직 완성되지 않은 경우 등: 이전 모델로 계속 서빙
+                print(f"[RecommenderService] 재로딩 실패, 이전 모델 유지: {e}")
+            finally:
+                self.lock.release()
+        return self.recommender
+
+    def recommend(self, cast, genre):
+        recommender = self.current()
+        version = self.version
+        with self.timer.stage('cache_lookup') if self.timer is not None else nullcontext():
+            recommendations = self.cache.get(cast, genre, version)
+        if recommendations is None:
+            recommendations = recommender.recommend(cast, genre)
+            self.cache.put(cast, genre, version, recommendations)
+        return recommendations
+
+    def recommend_many(self, pairs):
+        return self.current().recommend_many(pairs)
+
+    def score(self, cast, genre):
+        return self.current().score(cast, genre)
+
+    def actor_list(self):
+        """현재 서빙 중인 모델이 아는 배우 목록"""
+        return list(self.current().label_encoders['cast'])
+
+    def active_reference_data(self):
+        return self.current().active_reference_data()
@@ -0,0 +1,86 @@
+import numpy as np
+
+
+class TitleIndex:
+    """타이틀 벡터 내적 검색 인덱스 (flat: 전체와 내적, ivf: k-means 클러스터 중심과 내적이 큰 nprobe 개 클러스터만 탐색)"""
+
+    def __init__(self, vectors, ids=None, nlist=None, nprobe=8, seed=42):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        self.ids = np.arange(len(vectors)) if ids is None else np.asarray(ids)  # 행 -> 타이틀 id
+        self.nprobe = nprobe
+        self.centroids = None
+        self.lists = None
+        if nlist:
+            self.build_ivf(nlist, seed)
+
+    def build_ivf(self, nlist, seed=42, iterations=20):
+        """k-means 로 타이틀을 nlist 개 클러스터로 나눔"""
+        rng = np.random.default_rng(seed)
+        nlist = min(nlist, len(self.vectors))
+        centroids = self.vectors[rng.choice(len(self.vectors), nlist, replace=False)].copy()
+        for _ in range(iterations):
+            distances = (np.square(self.vectors).sum(axis=1, keepdims=True)
+                         - 2 * self.vectors @ centroids.T + np.square(centroids).sum(axis=1))
+            assignment = distances.argmin(axis=1)
+            for cluster in range(nlist):
+                members = self.vectors[assignment == cluster]
+                if len(members):
+                    centroids[cluster] = members.mean(axis=0)
+        self.centroids = centroids
+        order = np.argsort(assignment, kind='stable')
+        bounds = np.searchsorted(assignment[order], np.arange(nlist + 1))
+        self.lists = [order[bounds[i]:bounds[i + 1]] for i in range(nlist)]
+
+    def search(self, query, n):
+        """쿼리 벡터와 내적이 큰 타이틀 id 최대 n 개 (내적 내림차순)"""
+        if self.centroids is None:
+            rows = np.arange(len(self.vectors))
+        else:
+            probe = np.argsort(-(self.centroids @ query), kind='stable')[:self.nprobe]
+            rows = np.concatenate([self.lists[cluster] for cluster in probe])
+        scores = self.vectors[rows] @ query
+        if len(rows) > n:
+            top = np.argpartition(-scores, n - 1)[:n]
+            rows, scores = rows[top], scores[top]
+        return self.ids[rows[np.argsort(-scores, kind='stable')]]
+
+
+def distill_towers(scores, rank=16):
+    """(배우 수, 타이틀 수) DeepFM 예측 점수 -> 배우/타이틀 벡터 (내적 ≈ logit)
+
+    logit 행렬을 타이틀 평균(인기도) + 저차원 SVD 로 근사: 타이틀 벡터 [S·V, 평균], 배우 벡터 [U, 1]
+    """
+    scores = np.clip(np.asarray(scores, dtype=np.float64), 1e-7, 1 - 1e-7)
+    logits = np.log(scores / (1 - scores))
+    title_mean = logits.mean(axis=0)
+    U, S, Vt = np.linalg.svd(logits - title_mean, full_matrices=False)
+    rank = min(rank, len(S))
+    cast_vectors = np.hstack([U[:, :rank], np.ones((len(U), 1))])
+    title_vectors = np.hstack([Vt[:rank].T * S[:rank], title_mean[:, None]])
+    return cast_vectors.astype(np.float32), title_vectors.astype(np.float32)
+
+
+class TwoTowerRetrieval:
+    """DeepFM 점수를 근사하는 배우/타이틀 벡터로 후보 타이틀 생성 (전체 + 요청 장르 안에서 절반씩)"""
+
+    def __init__(self, scores, title_ids, title_genres, rank=16, nlist=None, nprobe=8):
+        """scores: (배우 수, len(title_ids)) 예측 점수, title_genres: title_ids 각각의 장르 id"""
+        self.cast_vectors, title_vectors = distill_towers(scores, rank)
+        # 처음 보는 배우: 타이틀 평균(인기도) 성분만 사용
+        self.prior = np.zeros(self.cast_vectors.shape[1], dtype=np.float32)
+        self.prior[-1] = 1
+        self.index = TitleIndex(title_vectors, title_ids, nlist=nlist, nprobe=nprobe)
+        self.genre_indexes = {}
+        for genre in np.unique(title_genres):
+            members = np.flatnonzero(title_genres == genre)
+            genre_nlist = int(np.sqrt(len(members))) if nlist else None
+            self.genre_indexes[genre] = TitleIndex(title_vectors[members], title_ids[members],
+                                                   nlist=genre_nlist, nprobe=nprobe)
+
+    def search(self, cast_id, genre_id, n):
+        """후보 타이틀 id (cast_id 가 None 이면 인기도 기준)"""
+        query = self.prior if cast_id is None else self.cast_vectors[cast_id]
+        ids = self.index.search(query, n // 2)
+        if genre_id in self.genre_indexes:
+            ids = np.union1d(ids, self.genre_indexes[genre_id].search(query, n - n // 2))
+        return ids
@@ -0,0 +1,102 @@
+import json
+import numpy as np
+import pandas as pd
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+
+
+class ScoreTable:
+    """(title, cast, genre) 조합별 예측 점수를 미리 계산해 배열로 보관"""
+    columns = ['title', 'cast', 'genre']
+
+    def __init__(self, triples, scores, vocab, encoder_version=None):
+        self.triples = triples  # (N, 3) int32: title, cast, genre 인코딩 값
+        self.scores = scores    # (N,) float32: 예측 점수
+        self.vocab = vocab      # 컬럼별 id -> 원래 값 리스트
+        self.encoder_version = encoder_version  # 생성 시 사용한 레이블 인코더 버전
+
+    @classmethod
+    def build(cls, model, data, label_encoders, encoder_version=None, encoder_artifact=None):
+        """학습된 모델로 유니크한 조합 전체를 한 번만 예측 (해싱 모드면 encoder_artifact 로 모델 입력 변환)"""
+        X = data[cls.columns].copy()
+        for column in cls.columns:
+            X[column] = X[column].map(label_encoders[column])
+        # 인코딩 실패 및 중복 제거
+        X = X.dropna().drop_duplicates().astype(np.int32)
+
+        triples = np.ascontiguousarray(X.values, dtype=np.int32)
+        inputs = [triples[:, 0], triples[:, 1], triples[:, 2]]
+        if encoder_artifact is not None:
+            inputs = encoder_artifact.model_inputs(*inputs)
+        predictions = model.predict(inputs, batch_size=4096, verbose=0)
+        scores = np.asarray(predictions, dtype=np.float32).reshape(-1)
+
+        vocab = {}
+        for column in cls.columns:
+            encoder = label_encoders[column]
+            vocab[column] = [None] * len(encoder)
+            for value, idx in encoder.items():
+                vocab[column][idx] = value
+        return cls(triples, scores, vocab, encoder_version)
+
+    def save(self, path):
+        """triples.npy, scores.npy, ids.json 으로 저장"""
+        os.makedirs(path, exist_ok=True)
+        np.save(os.path.join(path, "triples.npy"), self.triples)
+        np.save(os.path.join(path, "scores.npy"), self.scores)
+        with open(os.path.join(path, "ids.json"), 'w', encoding='utf-8') as file:
+            json.dump({'encoder_version': self.encoder_version, **self.vocab}, file, ensure_ascii=False)
+
+    @classmethod
+    def load(cls, path, mmap=True):
+        """저장된 점수 테이블 로드 (기본은 memmap)"""
+        mmap_mode = 'r' if mmap else None
+        try:
+            triples = np.load(os.path.join(path, "triples.npy"), mmap_mode=mmap_mode)
+            scores = np.load(os.path.join(path, "scores.npy"), mmap_mode=mmap_mode)
+            with open(os.path.join(path, "ids.json"), 'r', encoding='utf-8') as file:
+                vocab = json.load(file)
+        except FileNotFoundError:
+            raise FileNotFoundError("점수 테이블을 찾을 수 없음")
+        encoder_version = vocab.pop('encoder_version', None)
+        return cls(triples, scores, vocab, encoder_version)
+
+    def label_encoders(self):
+        """값 -> id 딕셔너리 (Recommender.label_encoders 형식)"""
+        return {column: {value: idx for idx, value in enumerate(self.vocab[column])}
+                for column in self.columns}
+
+    def frame(self):
+        """예측 결과를 기존 추천 로직에서 쓰던 DataFrame 형태로 반환"""
+        return pd.DataFrame({
+            'title': self.triples[:, 0],
+            'cast': self.triples[:, 1],
+            'genre': self.triples[:, 2],
+            'predicted_score': self.scores,
+        })
+
+
+def build_score_table():
+    """학습된 모델(NumPy 모델 우선)로 점수 테이블 생성 후 저장"""
+    from recommend import Recommender
+
+    recommender = Recommender()
+    # NumPy 모델이 있으면 TensorFlow 없이 점수 계산
+    if os.path.exists(config.numpy_model_path):
+        recommender.load_numpy_model()
+    else:
+        recommender.load_model()
+    recommender.load_label_encoders()
+    recommender.load_data()
+    table = ScoreTable.build(recommender.model, recommender.data,
+                             recommender.label_encoders, recommender.encoder_version,
+                             recommender.encoder_artifact)
+    table.save(config.score_table_path)
+    print(f"점수 테이블 저장 완료: {len(table.scores)}개 조합 -> {config.score_table_path}")
+    return table
+
+
+if __name__ == "__main__":
+    build_score_table()
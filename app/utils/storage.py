@@ -0,0 +1,220 @@
+"""
+파이프라인 중간 데이터 저장소 (per+raw.json -> processed_data -> add_genre_story -> df_with_negatives)
+
+각 단계는 config 의 JSON lines 경로를 이름으로 사용하고, 실제로는 같은 이름의 .parquet / .feather 파일에
+컬럼 타입을 지정하여 저장한다 (문자열 컬럼은 dictionary 인코딩). 호환을 위해 JSON lines 도 함께 내보낼 수 있다.
+형식: config.storage_format (환경 변수 PIPELINE_STORAGE 로 덮어쓰기), JSON 내보내기: config.storage_export_json
+
+실행: python storage.py  -> 기존 JSON 중간 데이터를 설정된 형식으로 변환 (이미 최신이면 건너뜀)
+"""
+import os
+import sys
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+
+suffixes = {'parquet': '.parquet', 'feather': '.feather', 'json': '.json'}
+# 파이프라인 중간 데이터 (JSON lines 경로 기준)
+pipeline_tables = [
+    f'{config.file_path}/{config.processed_data}',
+    f'{config.file_path}/{config.add_genre_file_name}',
+    config.df_with_negatives_path,
+]
+
+
+def storage_format():
+    storage = os.getenv("PIPELINE_STORAGE", config.storage_format)
+    if storage not in suffixes:
+        raise ValueError(f"지원하지 않는 저장 형식: {storage}")
+    return storage
+
+
+def format_path(path, storage=None):
+    """JSON lines 경로 -> 해당 형식의 파일 경로 (확장자만 교체)"""
+    return os.path.splitext(path)[0] + suffixes[storage or storage_format()]
+
+
+def typed_frame(df):
+    """object 컬럼 타입 정리: 숫자만 있으면 숫자형, 그 외(문자열/숫자 혼합)는 문자열 (None 유지)"""
+    df = df.copy()
+    for column in df.columns[df.dtypes == object]:
+        values = df[column].dropna()
+        if values.map(lambda value: isinstance(value, str)).all():
+            continue
+        numeric = pd.to_numeric(values, errors='coerce')
+        if numeric.notna().all():
+            df[column] = pd.to_numeric(df[column])
+        else:
+            df[column] = df[column].map(lambda value: value if value is None or isinstance(value, str) or pd.isna(value)
+                                        else str(value))
+    return df
+
+
+def to_arrow(df):
+    """DataFrame -> Arrow 테이블 (문자열 컬럼은 dictionary<int32, string>)"""
+    table = pa.Table.from_pandas(typed_frame(df), preserve_index=False)
+    fields = [pa.field(field.name, pa.dictionary(pa.int32(), pa.string()))
+              if pa.types.is_string(field.type) or pa.types.is_large_string(field.type) else field
+              for field in table.schema]
+    return table.cast(pa.schema(fields, metadata=table.schema.metadata))
+
+
+def from_arrow(table, categorical=False):
+    """Arrow 테이블 -> DataFrame (categorical=False 면 dictionary 컬럼을 일반 문자열로 풀어서 JSON 과 같은 타입)"""
+    if not categorical:
+        fields = [pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+                  for field in table.schema]
+        table = table.cast(pa.schema(fields, metadata=table.schema.metadata))
+    return table.to_pandas()
+
+
+def write_json(df, path):
+    df.to_json(path, orient='records', lines=True, force_ascii=False)
+
+
+def write_table(df, path, storage=None, export_json=None):
+    """중간 데이터 저장: 설정된 형식 + (export_json 이면) JSON lines. 임시 파일에 쓴 뒤 교체"""
+    storage = storage or storage_format()
+    export_json = config.storage_export_json if export_json is None else export_json
+    # JSON 을 먼저 써야 설정된 형식 파일이 더 최신으로 남아 table_path 가 그 파일을 고름
+    targets = (['json'] if export_json and storage != 'json' else []) + [storage]
+    for target in targets:
+        target_path = format_path(path, target)
+        tmp_path = f"{target_path}.tmp"
+        if target == 'json':
+            write_json(df, tmp_path)
+        elif target == 'parquet':
+            pq.write_table(to_arrow(df), tmp_path, compression='zstd')
+        else:
+            feather.write_feather(to_arrow(df), tmp_path, compression='lz4')
+        os.replace(tmp_path, target_path)
+
+
+def table_path(path, storage=None):
+    """read_table 이 읽을 파일: 설정된 형식 파일이 있고 JSON 보다 오래되지 않았으면 그 파일, 아니면 JSON (둘 다 없으면 None)"""
+    columnar_path = format_path(path, storage)
+    json_path = format_path(path, 'json')
+    if os.path.exists(columnar_path) and (not os.path.exists(json_path)
+                                          or os.path.getmtime(columnar_path) >= os.path.getmtime(json_path)):
+        return columnar_path
+    return json_path if os.path.exists(json_path) else None
+
+
+def table_exists(path):
+    return table_path(path) is not None
+
+
+def table_mtime(path):
+    """중간 데이터 수정 시각 (단계 실행 조건 비교용)"""
+    existing = table_path(path)
+    if existing is None:
+        raise FileNotFoundError(f"중간 데이터를 찾을 수 없음: {path}")
+    return os.path.getmtime(existing)
+
+
+def read_table(path, columns=None, categorical=False):
+    """중간 데이터 읽기 (columns: 필요한 컬럼만, categorical: 문자열 컬럼을 category 로 유지)"""
+    existing = table_path(path)
+    if existing is None:
+        raise FileNotFoundError(f"중간 데이터를 찾을 수 없음: {path}")
+    if existing.endswith(suffixes['parquet']):
+        return from_arrow(pq.read_table(existing, columns=columns), categorical)
+    if existing.endswith(suffixes['feather']):
+        return from_arrow(feather.read_table(existing, columns=columns), categorical)
+    df = pd.read_json(existing, lines=True, encoding='utf-8-sig')
+    return df[columns] if columns is not None else df
+
+
+def iter_table(path, chunk_size, columns=None):
+    """중간 데이터를 chunk_size 행씩 읽음 (parquet 은 배치 단위로 읽어서 전체를 올리지 않음)"""
+    existing = table_path(path)
+    if existing is None:
+        raise FileNotFoundError(f"중간 데이터를 찾을 수 없음: {path}")
+    if existing.endswith(suffixes['parquet']):
+        for batch in pq.ParquetFile(existing).iter_batches(batch_size=chunk_size, columns=columns):
+            yield from_arrow(pa.Table.from_batches([batch]))
+    elif existing.endswith(suffixes['feather']):
+        table = feather.read_table(existing, columns=columns, memory_map=True)
+        for batch in table.to_batches(max_chunksize=chunk_size):
+            yield from_arrow(pa.Table.from_batches([batch]))
+    else:
+        with pd.read_json(existing, lines=True, chunksize=chunk_size) as reader:
+            for chunk in reader:
+                yield chunk[columns] if columns is not None else chunk
+
+
+def append_tables(path, parts, storage=None, export_json=None):
+    """parquet 조각(part) 파일들을 순서대로 이어 붙여 하나의 중간 데이터로 저장하고 전체 행 수 반환 (조각 파일은 그대로 둠)
+
+    parts 는 조각 경로의 iterable 로, 만들어지는 중인 조각도 순서대로 받을 수 있다. 조각을 한 번씩만 읽어 첫 조각의 스키마로 맞춘 뒤
+    parquet 은 ParquetWriter 에 row group 으로, JSON lines 는 텍스트로 바로 이어서 기록한다.
+    feather(IPC 파일)는 파일 하나에 dictionary 가 하나여야 하므로 조각을 모아 dictionary 를 합친 뒤 기록한다.
+    """
+    storage = storage or storage_format()
+    export_json = config.storage_export_json if export_json is None else export_json
+    targets = (['json'] if export_json and storage != 'json' else []) + [storage]
+    tmp_paths = {target: f"{format_path(path, target)}.tmp" for target in targets}
+    schema, rows, parquet_writer, json_file, feather_tables = None, 0, None, None, []
+    completed = False
+    try:
+        if 'json' in targets:
+            json_file = open(tmp_paths['json'], 'w', encoding='utf-8')
+        for part in parts:
+            table = pq.read_table(format_path(part, 'parquet'))
+            if schema is None:
+                schema = table.schema
+            elif not table.num_rows:  # 빈 조각은 컬럼 타입을 알 수 없으므로 건너뜀
+                continue
+            else:
+                table = table.select(schema.names).cast(schema)
+            rows += table.num_rows
+            if 'parquet' in targets:
+                if parquet_writer is None:
+                    parquet_writer = pq.ParquetWriter(tmp_paths['parquet'], schema, compression='zstd')
+                parquet_writer.write_table(table)
+            if 'feather' in targets:
+                feather_tables.append(table)
+            if json_file is not None and table.num_rows:
+                json_file.write(from_arrow(table).to_json(orient='records', lines=True, force_ascii=False).rstrip('\n') + '\n')
+        if feather_tables:
+            table = pa.concat_tables(feather_tables).unify_dictionaries().combine_chunks()
+            feather.write_feather(table, tmp_paths['feather'], compression='lz4')
+        completed = True
+    finally:
+        if parquet_writer is not None:
+            parquet_writer.close()
+        if json_file is not None:
+            json_file.close()
+        if not completed:  # 실패 시 임시 파일 정리 (기존 출력은 그대로)
+            for tmp_path in tmp_paths.values():
+                if os.path.exists(tmp_path):
+                    os.remove(tmp_path)
+    # JSON 을 먼저 교체해야 설정된 형식 파일이 더 최신으로 남음 (write_table 과 같은 순서)
+    for target in targets:
+        os.replace(tmp_paths[target], format_path(path, target))
+    return rows
+
+
+def sync_table(path, storage=None):
+    """JSON 만 있거나 JSON 이 더 최신이면 설정된 형식으로 변환 (변환했으면 True)"""
+    storage = storage or storage_format()
+    if storage == 'json' or table_path(path, storage) != format_path(path, 'json'):
+        return False
+    json_path = format_path(path, 'json')
+    write_table(read_table(path), path, storage=storage, export_json=False)
+    # 내용은 JSON 과 같으므로 수정 시각도 맞춰 둠 (변환만으로 이후 단계가 다시 실행되지 않도록)
+    os.utime(format_path(path, storage), (os.path.getatime(json_path), os.path.getmtime(json_path)))
+    return True
+
+
+if __name__ == "__main__":
+    for path in pipeline_tables:
+        if not table_exists(path):
+            print(f"pass {os.path.basename(path)} (파일 없음)")
+        elif sync_table(path):
+            print(f"{os.path.basename(path)} -> {format_path(path)}")
+        else:
+            print(f"pass {os.path.basename(path)}")
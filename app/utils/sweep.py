@@ -0,0 +1,175 @@
+"""
+DeepFM 하이퍼파라미터 탐색 (프로세스 풀 병렬 학습)
+
+실행: python sweep.py [탐색공간.json] [--workers 4] [--threads 1]
+탐색공간.json 예: {"embedding_dim": [8, 16, 32], "hidden_units": [[128, 64, 32], [64, 32]], "batch_size": [64, 256]}
+전처리된 데이터는 학습/검증으로 나눈 연속 배열 .npy 로 한 번만 저장하고, 각 워커는 mmap 으로 열어 복사 없이 그대로 넘긴다.
+(학습 중 배치는 Keras 가 텐서로 변환)
+조합별 검증 AUC, 학습 시간, NumPy 추론 지연 시간을 leaderboard.csv / leaderboard.json 으로 저장한다.
+"""
+import argparse
+import itertools
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import numpy as np
+import pandas as pd
+import sys
+import os
+sys.path.append(os.path.abspath(os.path.dirname(__file__)))
+sys.path.append(os.path.abspath(os.path.join(os.path.dirname(__file__), '../../')))
+import config
+
+# 탐색공간 파일을 주지 않았을 때의 기본 탐색 범위
+default_space = {
+    'embedding_dim': [8, 16, 32],
+    'hidden_units': [[128, 64, 32], [64, 32]],
+    'dropout': [0.3],
+    'l2': [1e-4],
+    'batch_size': [64, 256],
+    'epochs': [20],
+}
+columns = ['title', 'cast', 'genre', 'target']
+splits = ['train', 'val']
+
+
+def expand_space(space):
+    """{파라미터: [값, ...]} -> 모든 조합의 파라미터 딕셔너리 리스트"""
+    keys = list(space)
+    return [dict(zip(keys, values)) for values in itertools.product(*(space[key] for key in keys))]
+
+
+def prepare_dataset(path):
+    """레이블 인코딩과 학습/검증 분리를 한 번만 수행하여 워커들이 mmap 으로 공유할 분할별 연속 .npy 로 저장
+    (워커에서 인덱스 배열로 고르면 워커마다 전체 복사본이 생기므로 미리 나눠 저장)"""
+    from sklearn.model_selection import train_test_split
+    from encoder_artifact import EncoderArtifact
+    from storage import read_table
+
+    data = read_table(config.df_with_negatives_path)
+    artifact = EncoderArtifact.fit(data)
+    encoders = artifact.label_encoders()
+    os.makedirs(path, exist_ok=True)
+    encoded = {column: data[column].astype(str).map(encoders[column]).to_numpy(dtype=np.int32)
+               for column in EncoderArtifact.columns}
+    encoded['target'] = data['target'].to_numpy(dtype=np.float32)
+    # DeepFM.prepare_training_data 와 같은 분리 (test_size=0.2, random_state=42)
+    train_index, val_index = train_test_split(np.arange(len(data)), test_size=0.2, random_state=42)
+    for split, index in zip(splits, [train_index, val_index]):
+        for column in columns:
+            np.save(os.path.join(path, f"{split}_{column}.npy"), np.ascontiguousarray(encoded[column][index]))
+    with open(os.path.join(path, "vocab_sizes.json"), 'w', encoding='utf-8') as file:
+        json.dump(artifact.vocab_sizes, file)
+
+
+def init_worker(threads):
+    """워커별 스레드 수 제한 (TensorFlow import 전에 설정해야 적용됨)"""
+    for name in ['OMP_NUM_THREADS', 'MKL_NUM_THREADS', 'OPENBLAS_NUM_THREADS',
+                 'TF_NUM_INTRAOP_THREADS', 'TF_NUM_INTEROP_THREADS']:
+        os.environ[name] = str(threads)
+    os.environ['TF_CPP_MIN_LOG_LEVEL'] = '2'
+    import tensorflow as tf
+    tf.config.threading.set_intra_op_parallelism_threads(threads)
+    tf.config.threading.set_inter_op_parallelism_threads(threads)
+
+
+def run_trial(trial_id, params, path):
+    """한 조합 학습 후 검증 AUC, 학습 시간, 추론 지연 시간 측정"""
+    from sklearn.metrics import roc_auc_score
+    from tensorflow.keras.callbacks import EarlyStopping
+    from DeepFM import MusicalRecommender
+    from numpy_model import NumpyDeepFM
+
+    data = {(split, column): np.load(os.path.join(path, f"{split}_{column}.npy"), mmap_mode='r')
+            for split in splits for column in columns}
+    with open(os.path.join(path, "vocab_sizes.json"), 'r', encoding='utf-8') as file:
+        vocab_sizes = json.load(file)
+
+    X_train, X_val = ([data[split, column] for column in ['title', 'cast', 'genre']] for split in splits)
+    y_train, y_val = (data[split, 'target'] for split in splits)
+
+    recommender = MusicalRecommender(params=params)
+    recommender.vocab_sizes = vocab_sizes
+    recommender.create_deepfm_model()
+
+    start = time.perf_counter()
+    history = recommender.model.fit(
+        X_train, y_train,
+        batch_size=recommender.params['batch_size'],
+        epochs=recommender.params['epochs'],
+        verbose=0,
+        validation_data=(X_val, y_val),
+        callbacks=[EarlyStopping(monitor='val_loss', patience=3, restore_best_weights=True)]
+    )
+    train_seconds = time.perf_counter() - start
+
+    # 서빙과 같은 NumPy 엔진으로 검증 데이터 예측 및 지연 시간 측정
+    engine = NumpyDeepFM.from_keras(recommender.model)
+    predictions = engine.predict(X_val).reshape(-1)
+    timings = []
+    for _ in range(20):
+        start = time.perf_counter()
+        engine.predict(X_val)
+        timings.append(time.perf_counter() - start)
+    latency_ms = float(np.median(timings) * 1000)
+
+    return {
+        'trial': trial_id,
+        'params': json.dumps(params),
+        'val_auc': round(float(roc_auc_score(y_val, predictions)), 5),
+        'val_loss': round(float(min(history.history['val_loss'])), 5),
+        'epochs_run': len(history.history['loss']),
+        'train_s': round(train_seconds, 2),
+        'latency_ms': round(latency_ms, 3),  # 검증 데이터 전체(val_rows 행) 예측 시간
+        'val_rows': int(len(y_val)),
+        'n_params': int(recommender.model.count_params()),
+    }
+
+
+def run_sweep(space, workers=4, threads=1, path=config.sweep_path):
+    trials = expand_space(space)
+    dataset_path = os.path.join(path, "dataset")
+    prepare_dataset(dataset_path)
+    print(f"탐색 조합 {len(trials)}개, 워커 {workers}개 x 스레드 {threads}개")
+
+    results = []
+    # spawn: 워커마다 새 인터프리터에서 TensorFlow 를 import 하여 스레드 설정이 적용되도록 함
+    context = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context,
+                             initializer=init_worker, initargs=(threads,)) as executor:
+        futures = {executor.submit(run_trial, trial_id, params, dataset_path): trial_id
+                   for trial_id, params in enumerate(trials)}
+        for future in as_completed(futures):
+            try:
+                result = future.result()
+            except Exception as e:
+                print(f"Error occurred in trial {futures[future]}: {e}")
+                continue
+            print(json.dumps(result, ensure_ascii=False))
+            results.append(result)
+
+    leaderboard = pd.DataFrame(results)
+    if len(leaderboard):
+        # 품질 대비 지연 시간 비교용
+        leaderboard['auc_per_ms'] = (leaderboard['val_auc'] / leaderboard['latency_ms']).round(5)
+        leaderboard = leaderboard.sort_values(['val_auc', 'latency_ms'], ascending=[False, True])
+    leaderboard.to_csv(os.path.join(path, "leaderboard.csv"), index=False)
+    leaderboard.to_json(os.path.join(path, "leaderboard.json"), orient='records', indent=2, force_ascii=False)
+    return leaderboard
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="DeepFM 하이퍼파라미터 병렬 탐색")
+    parser.add_argument('space', nargs='?', help="탐색공간 JSON 파일 (없으면 기본 탐색 범위)")
+    parser.add_argument('--workers', type=int, default=max(1, (os.cpu_count() or 1) // 2))
+    parser.add_argument('--threads', type=int, default=1, help="워커별 TensorFlow/BLAS 스레드 수")
+    args = parser.parse_args()
+
+    space = default_space
+    if args.space:
+        with open(args.space, 'r', encoding='utf-8') as file:
+            space = json.load(file)
+    leaderboard = run_sweep(space, workers=args.workers, threads=args.threads)
+    print(leaderboard.to_string(index=False))
+    print(f"리더보드 저장 완료: {os.path.join(config.sweep_path, 'leaderboard.csv')}")
@@ -12,6 +12,22 @@ add_genre_file_name = "add_genre_story.json"
 df_with_negatives_path = os.path.join(file_path, "df_with_negatives.json")
 picture_file_path = os.path.join(BASE_DIR, "app", "static", "Performance.jpg")
 save_model_path = os.path.join(file_path, "Model", "Recommend.h5")
+score_table_path = os.path.join(file_path, "Model", "score_table")
+label_encoder_path = os.path.join(file_path, "Model", "label_encoders.json")
+numpy_model_path = os.path.join(file_path, "Model", "Recommend.npz")
+recommend_cache_path = os.path.join(file_path, "Model", "recommend_cache")
+trained_rows_path = os.path.join(file_path, "Model", "trained_rows.npy")
+sweep_path = os.path.join(file_path, "Model", "sweep")
+evaluation_path = os.path.join(file_path, "Model", "evaluation.json")
+train_metrics_path = os.path.join(file_path, "Model", "train_metrics.jsonl")
+model_registry_path = os.path.join(file_path, "Model", "registry")
+pipeline_state_path = os.path.join(file_path, "Model", "pipeline_state.json")
+# 백그라운드 파이프라인 작업 상태 파일 (페이지가 읽음), 작업 로그
+pipeline_status_path = os.path.join(file_path, "Model", "pipeline_status.json")
+pipeline_worker_log_path = os.path.join(file_path, "Model", "pipeline_worker.log")
+# 파이프라인 중간 데이터 저장 형식 ('parquet' | 'feather' | 'json', 위 JSON 경로와 같은 이름), JSON lines 도 함께 내보낼지
+storage_format = "parquet"
+storage_export_json = True
     
 # genre
 unique_genres = [